@@ -1,98 +1,58 @@
 from __future__ import annotations
 
-import json
+import functools
 import os
 import time
 from typing import Any
 
-from tools.limits import enforce_daily_limits
-
-_ENV_BOOTSTRAPPED = False
+import orjson
 
+from tools.env import env as _env
+from tools.limits import enforce_daily_limits
 
-def _load_dotenv_file(file_path: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for raw in f.read().splitlines():
-                line = raw.strip()
-                if not line:
-                    continue
-                if line.startswith("#"):
-                    continue
-                if "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                key = k.strip()
-                if not key:
-                    continue
-                val = v.strip()
-                if len(val) >= 2 and (
-                    (val[0] == val[-1] and val[0] in ("'", '"')) or (val[0] == "`" and val[-1] == "`")
-                ):
-                    val = val[1:-1].strip()
-                out[key] = val
-    except Exception:
-        return {}
-    return out
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DEFAULT_STATE_PATH = os.path.join(_PROJECT_ROOT, "data", "power_state.json")
 
+_SEP_TRANS = str.maketrans({"，": ","})
 
-def _bootstrap_env() -> None:
-    global _ENV_BOOTSTRAPPED
-    if _ENV_BOOTSTRAPPED:
-        return
-    _ENV_BOOTSTRAPPED = True
-    explicit = str(os.environ.get("MCP_TOOLS_ENV_FILE") or "").strip()
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    env_file = explicit or os.path.join(root, ".env")
-    if not os.path.exists(env_file):
-        return
-    parsed = _load_dotenv_file(env_file)
-    for k, v in parsed.items():
-        if k not in os.environ:
-            os.environ[k] = v
-
-
-def _env(name: str) -> str | None:
-    _bootstrap_env()
-    v = os.environ.get(name)
-    if not v:
-        return None
-    s = str(v).strip()
-    return s or None
+_STATE_CACHE: dict[str, tuple[tuple[int, int], dict[str, Any]]] = {}
+_MADE_DIRS: set[str] = set()
 
 
 def _project_root() -> str:
-    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return _PROJECT_ROOT
 
 
 def _default_state_path() -> str:
-    return os.path.join(_project_root(), "data", "power_state.json")
+    return _DEFAULT_STATE_PATH
 
 
 def _now_ms() -> int:
-    return int(time.time() * 1000)
+    return time.time_ns() // 1_000_000
+
 
+@functools.lru_cache(maxsize=8)
+def _split_ids(raw: str) -> frozenset[str]:
+    parts = [p.strip() for p in raw.translate(_SEP_TRANS).split(",")]
+    return frozenset(p for p in parts if p)
 
-def _parse_admin_ids() -> set[str]:
+
+def _parse_admin_ids() -> frozenset[str]:
     raw = str(_env("BOT_ADMIN_QQ_IDS") or "").strip()
     if not raw:
-        return set()
-    parts = [p.strip() for p in raw.replace("，", ",").split(",")]
-    return {p for p in parts if p}
+        return frozenset()
+    return _split_ids(raw)
 
 
-def _parse_allowed_groups() -> set[str] | None:
+def _parse_allowed_groups() -> frozenset[str] | None:
     raw = str(_env("BOT_POWER_GROUP_IDS") or "").strip()
     if not raw:
         return None
-    parts = [p.strip() for p in raw.replace("，", ",").split(",")]
-    out = {p for p in parts if p}
-    return out or None
+    return _split_ids(raw) or None
 
 
-def _state_path() -> str:
-    p = str(_env("BOT_POWER_STATE_FILE") or "").strip()
+@functools.lru_cache(maxsize=8)
+def _resolve_state_path(p: str) -> str:
     if not p:
         return _default_state_path()
     expanded = os.path.expanduser(p)
@@ -101,29 +61,65 @@ def _state_path() -> str:
     return os.path.abspath(os.path.join(_project_root(), expanded))
 
 
+def _state_path() -> str:
+    return _resolve_state_path(str(_env("BOT_POWER_STATE_FILE") or "").strip())
+
+
 def _read_state() -> dict[str, Any]:
     path = _state_path()
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            v = json.load(f)
-            if isinstance(v, dict):
-                return v
+        st = os.stat(path)
+    except OSError:
+        return {"groups": {}}
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _STATE_CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return dict(cached[1])
+    try:
+        with open(path, "rb") as f:
+            v = orjson.loads(f.read())
     except Exception:
         return {"groups": {}}
-    return {"groups": {}}
+    if not isinstance(v, dict):
+        return {"groups": {}}
+    _STATE_CACHE[path] = (key, v)
+    return dict(v)
 
 
-def _atomic_write_json(path: str, obj: dict[str, Any]) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
+def _open_tmp(path: str) -> tuple[str, int]:
+    d = os.path.dirname(path)
+    if d not in _MADE_DIRS:
+        os.makedirs(d, exist_ok=True)
+        _MADE_DIRS.add(d)
     tmp = f"{path}.tmp.{os.getpid()}"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    try:
+        return tmp, os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    except FileNotFoundError:
+        _MADE_DIRS.discard(d)
+        os.makedirs(d, exist_ok=True)
+        _MADE_DIRS.add(d)
+        return tmp, os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+
+
+def _atomic_write_json(path: str, obj: dict[str, Any]) -> os.stat_result:
+    buf = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    tmp, fd = _open_tmp(path)
+    try:
+        view = memoryview(buf)
+        while view:
+            view = view[os.write(fd, view) :]
+        st = os.fstat(fd)
+    finally:
+        os.close(fd)
     os.replace(tmp, path)
+    return st
 
 
 def _write_state(state: dict[str, Any]) -> None:
     path = _state_path()
-    _atomic_write_json(path, state)
+    _STATE_CACHE.pop(path, None)
+    st = _atomic_write_json(path, state)
+    _STATE_CACHE[path] = ((st.st_mtime_ns, st.st_size), dict(state))
 
 
 def _require_group(chat_type: str, group_id: str | None) -> str:
@@ -216,7 +212,7 @@ def register(mcp) -> None:
         try:
             enforce_daily_limits(tool_name="bot_power_off", chat_type=chat_type, user_id=user_id, group_id=group_id)
             res = power_off_group(chat_type=chat_type, group_id=group_id, user_id=user_id, hours=hours)
-            return json.dumps(res, ensure_ascii=False, indent=2)
+            return orjson.dumps(res, option=orjson.OPT_INDENT_2).decode("utf-8")
         except Exception as e:
             return f"错误：{e}"
 
@@ -225,7 +221,7 @@ def register(mcp) -> None:
         try:
             enforce_daily_limits(tool_name="bot_power_on", chat_type=chat_type, user_id=user_id, group_id=group_id)
             res = power_on_group(chat_type=chat_type, group_id=group_id, user_id=user_id)
-            return json.dumps(res, ensure_ascii=False, indent=2)
+            return orjson.dumps(res, option=orjson.OPT_INDENT_2).decode("utf-8")
         except Exception as e:
             return f"错误：{e}"
 
@@ -235,6 +231,6 @@ def register(mcp) -> None:
             enforce_daily_limits(tool_name="bot_power_status", chat_type=chat_type, user_id=user_id, group_id=group_id)
             gid = _require_group(chat_type, group_id)
             res = _get_group_status(gid)
-            return json.dumps(res, ensure_ascii=False, indent=2)
+            return orjson.dumps(res, option=orjson.OPT_INDENT_2).decode("utf-8")
         except Exception as e:
             return f"错误：{e}"
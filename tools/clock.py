@@ -3,89 +3,48 @@
 from __future__ import annotations
 
 import datetime as dt
-import json
-import os
 import time
-from zoneinfo import ZoneInfo
 
+import orjson
 from mcp.server.fastmcp import FastMCP
 
+from tools.env import env as _env
 from tools.limits import enforce_daily_limits
-
-_ENV_BOOTSTRAPPED = False
-
-
-def _load_dotenv_file(file_path: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for raw in f.read().splitlines():
-                line = raw.strip()
-                if not line:
-                    continue
-                if line.startswith("#"):
-                    continue
-                if "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                key = k.strip()
-                if not key:
-                    continue
-                val = v.strip()
-                if len(val) >= 2 and (
-                    (val[0] == val[-1] and val[0] in ("'", '"')) or (val[0] == "`" and val[-1] == "`")
-                ):
-                    val = val[1:-1].strip()
-                out[key] = val
-    except Exception:
-        return {}
-    return out
-
-
-def _bootstrap_env() -> None:
-    global _ENV_BOOTSTRAPPED
-    if _ENV_BOOTSTRAPPED:
-        return
-    _ENV_BOOTSTRAPPED = True
-    explicit = str(os.environ.get("MCP_TOOLS_ENV_FILE") or "").strip()
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    env_file = explicit or os.path.join(root, ".env")
-    if not os.path.exists(env_file):
-        return
-    parsed = _load_dotenv_file(env_file)
-    for k, v in parsed.items():
-        if k not in os.environ:
-            os.environ[k] = v
-
-
-def _env(name: str) -> str | None:
-    _bootstrap_env()
-    v = os.environ.get(name)
-    if not v:
-        return None
-    s = str(v).strip()
-    return s or None
+from tools.tz import get_zoneinfo_or_default
 
 
 def _resolve_timezone(tz: str | None) -> dt.tzinfo:
-    name = str(tz or "").strip() or str(_env("TIMEZONE") or "").strip() or "Asia/Shanghai"
-    try:
-        return ZoneInfo(name)
-    except Exception:
-        return ZoneInfo("Asia/Shanghai")
+    name = (str(tz).strip() if tz else "") or _env("TIMEZONE") or "Asia/Shanghai"
+    return get_zoneinfo_or_default(name)
 
 
 def _resolve_now_ms(at_ms: int | None) -> int:
-    return int(at_ms) if isinstance(at_ms, int) else int(time.time() * 1000)
+    return int(at_ms) if isinstance(at_ms, int) else time.time_ns() // 1_000_000
+
+
+def _ms_to_local(ms: int, tz: dt.tzinfo) -> dt.datetime:
+    return dt.datetime.fromtimestamp(ms // 1000, tz=tz).replace(microsecond=ms % 1000 * 1000)
+
+
+_WEEKDAY_EN = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+_WEEKDAY_CN = ("星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日")
+_CUM_DAYS = (0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
 
 
 def _weekday_cn_for(d: dt.datetime) -> str:
-    return ["星期日", "星期一", "星期二", "星期三", "星期四", "星期五", "星期六"][int(d.strftime("%w"))]
+    return _WEEKDAY_CN[d.weekday()]
 
 
 def _day_of_year_for(d: dt.datetime) -> int:
-    start = dt.datetime(d.year, 1, 1, tzinfo=d.tzinfo)
-    return int((d - start).total_seconds() // 86400) + 1
+    y, m = d.year, d.month
+    leap = m > 2 and y % 4 == 0 and (y % 100 != 0 or y % 400 == 0)
+    return _CUM_DAYS[m - 1] + d.day + leap
+
+
+def _format_date(d: dt.datetime, date_format: str) -> str:
+    if date_format == "%Y-%m-%d":
+        return f"{d.year:04d}-{d.month:02d}-{d.day:02d}"
+    return d.strftime(date_format)
 
 
 def _build_datetime_payload(
@@ -98,20 +57,20 @@ def _build_datetime_payload(
     include_weekday_cn: bool = True,
     include_day_of_year: bool = True,
 ) -> dict:
-    local = dt.datetime.fromtimestamp(now_ms / 1000, tz=tz)
+    local = _ms_to_local(int(now_ms), tz)
     utc = local.astimezone(dt.timezone.utc)
     payload: dict = {
         "tz": str(getattr(tz, "key", None) or tz),
         "epoch_ms": int(now_ms),
-        "iso_utc": utc.isoformat().replace("+00:00", "Z"),
+        "iso_utc": utc,
         "local": local.strftime(locale_format),
-        "date": local.strftime(date_format),
+        "date": _format_date(local, date_format),
         "year": int(local.year),
         "month": int(local.month),
         "day": int(local.day),
     }
     if include_weekday:
-        payload["weekday"] = local.strftime("%A")
+        payload["weekday"] = _WEEKDAY_EN[local.weekday()]
     if include_weekday_cn:
         payload["weekday_cn"] = _weekday_cn_for(local)
     if include_day_of_year:
@@ -148,7 +107,7 @@ def register(mcp: FastMCP) -> None:
             include_weekday_cn=include_weekday_cn,
             include_day_of_year=include_day_of_year,
         )
-        return json.dumps(payload, ensure_ascii=False, indent=2)
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_UTC_Z).decode("utf-8")
 
     @mcp.tool(name="now", description="获取当前时间（UTC ISO 与本地时间字符串，可选时区）")
     def now(
@@ -174,4 +133,4 @@ def register(mcp: FastMCP) -> None:
             include_day_of_year=False,
         )
         out = {"iso": payload["iso_utc"], "locale": payload["local"], "tz": payload["tz"], "epoch_ms": payload["epoch_ms"]}
-        return json.dumps(out, ensure_ascii=False, indent=2)
+        return orjson.dumps(out, option=orjson.OPT_INDENT_2 | orjson.OPT_UTC_Z).decode("utf-8")
@@ -3,110 +3,78 @@
 from __future__ import annotations
 
 import datetime as dt
-import json
-import os
-import time
-from zoneinfo import ZoneInfo
+import functools
 
+import orjson
 from mcp.server.fastmcp import FastMCP
 
+from tools.env import env as _env
 from tools.limits import enforce_daily_limits
-
-_ENV_BOOTSTRAPPED = False
-
-
-def _load_dotenv_file(file_path: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for raw in f.read().splitlines():
-                line = raw.strip()
-                if not line:
-                    continue
-                if line.startswith("#"):
-                    continue
-                if "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                key = k.strip()
-                if not key:
-                    continue
-                val = v.strip()
-                if len(val) >= 2 and (
-                    (val[0] == val[-1] and val[0] in ("'", '"')) or (val[0] == "`" and val[-1] == "`")
-                ):
-                    val = val[1:-1].strip()
-                out[key] = val
-    except Exception:
-        return {}
-    return out
-
-
-def _bootstrap_env() -> None:
-    global _ENV_BOOTSTRAPPED
-    if _ENV_BOOTSTRAPPED:
-        return
-    _ENV_BOOTSTRAPPED = True
-    explicit = str(os.environ.get("MCP_TOOLS_ENV_FILE") or "").strip()
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    env_file = explicit or os.path.join(root, ".env")
-    if not os.path.exists(env_file):
-        return
-    parsed = _load_dotenv_file(env_file)
-    for k, v in parsed.items():
-        if k not in os.environ:
-            os.environ[k] = v
-
-
-def _env(name: str) -> str | None:
-    _bootstrap_env()
-    v = os.environ.get(name)
-    if not v:
-        return None
-    s = str(v).strip()
-    return s or None
+from tools.tz import get_zoneinfo_or_default
 
 
 def _resolve_timezone(tz: str | None) -> dt.tzinfo:
-    name = str(tz or "").strip() or str(_env("TIMEZONE") or "").strip() or "Asia/Shanghai"
-    try:
-        return ZoneInfo(name)
-    except Exception:
-        return ZoneInfo("Asia/Shanghai")
+    name = (str(tz).strip() if tz else "") or _env("TIMEZONE") or "Asia/Shanghai"
+    return get_zoneinfo_or_default(name)
+
+
+def _now_local(tz: dt.tzinfo) -> dt.datetime:
+    return dt.datetime.now(tz)
 
 
-def _resolve_now_ms(at_ms: int | None) -> int:
-    return int(at_ms) if isinstance(at_ms, int) else int(time.time() * 1000)
+def _ms_to_local(ms: int, tz: dt.tzinfo) -> dt.datetime:
+    return dt.datetime.fromtimestamp(ms // 1000, tz=tz).replace(microsecond=ms % 1000 * 1000)
+
+
+_WEEKDAY_EN = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+_WEEKDAY_CN = ("星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日")
+_CUM_DAYS = (0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
 
 
 def _weekday_cn_for(d: dt.datetime) -> str:
-    return ["星期日", "星期一", "星期二", "星期三", "星期四", "星期五", "星期六"][int(d.strftime("%w"))]
+    return _WEEKDAY_CN[d.weekday()]
 
 
 def _day_of_year_for(d: dt.datetime) -> int:
-    start = dt.datetime(d.year, 1, 1, tzinfo=d.tzinfo)
-    return int((d - start).total_seconds() // 86400) + 1
+    y, m = d.year, d.month
+    leap = m > 2 and y % 4 == 0 and (y % 100 != 0 or y % 400 == 0)
+    return _CUM_DAYS[m - 1] + d.day + leap
+
 
+def _format_date(d: dt.datetime, date_format: str) -> str:
+    if date_format == "%Y-%m-%d":
+        return f"{d.year:04d}-{d.month:02d}-{d.day:02d}"
+    return d.strftime(date_format)
 
-def _build_payload(*, now_ms: int, tz: dt.tzinfo, date_format: str = "%Y-%m-%d") -> dict:
-    local = dt.datetime.fromtimestamp(now_ms / 1000, tz=tz)
+
+_DEFAULT_DATE_FORMAT = "%Y-%m-%d"
+
+
+def _payload_for(local: dt.datetime, date_format: str) -> dict:
     return {
-        "date": local.strftime(date_format),
+        "date": _format_date(local, date_format),
         "year": int(local.year),
         "month": int(local.month),
         "day": int(local.day),
-        "weekday": local.strftime("%A"),
+        "weekday": _WEEKDAY_EN[local.weekday()],
         "weekday_cn": _weekday_cn_for(local),
         "day_of_year": _day_of_year_for(local),
     }
 
 
+@functools.lru_cache(maxsize=8)
+def _default_payload_json(tz: dt.tzinfo, day_ordinal: int) -> str:
+    local = dt.datetime.combine(dt.date.fromordinal(day_ordinal), dt.time(), tzinfo=tz)
+    payload = _payload_for(local, _DEFAULT_DATE_FORMAT)
+    return orjson.dumps(payload, option=orjson.OPT_INDENT_2).decode("utf-8")
+
+
 def register(mcp: FastMCP) -> None:
     @mcp.tool(name="get_date", description="获取当前日期的详细信息")
     def get_date(
         tz: str | None = None,
         at_ms: int | None = None,
-        date_format: str = "%Y-%m-%d",
+        date_format: str = _DEFAULT_DATE_FORMAT,
         chat_type: str | None = None,
         user_id: str | None = None,
         group_id: str | None = None,
@@ -116,6 +84,8 @@ def register(mcp: FastMCP) -> None:
         except Exception as e:
             return f"错误：{e}"
         tz0 = _resolve_timezone(tz)
-        now_ms = _resolve_now_ms(at_ms)
-        payload = _build_payload(now_ms=now_ms, tz=tz0, date_format=date_format)
-        return json.dumps(payload, ensure_ascii=False, indent=2)
+        local = _ms_to_local(int(at_ms), tz0) if isinstance(at_ms, int) else _now_local(tz0)
+        if date_format == _DEFAULT_DATE_FORMAT:
+            return _default_payload_json(tz0, local.toordinal())
+        payload = _payload_for(local, date_format)
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2).decode("utf-8")
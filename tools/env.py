@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_ENV_FILE_PATH = os.path.join(_ROOT, ".env")
+
+_CACHED: dict[str, tuple[int, dict[str, str]]] = {}
+_BOOTSTRAPPED: set[str] = set()
+_BOOTSTRAP_LOCK = threading.Lock()
+
+_DOTENV_LINE_RE = re.compile(r"\s*(?![\s#])([^=]*?)\s*=\s*(.*?)\s*")
+_QUOTE_PAIRS = frozenset({("'", "'"), ('"', '"'), ("`", "`")})
+
+
+def _parse_dotenv_text(text: str) -> dict[str, str]:
+    out: dict[str, str] = {}
+    for line in text.splitlines():
+        m = _DOTENV_LINE_RE.fullmatch(line)
+        if m is None:
+            continue
+        key, val = m.group(1), m.group(2)
+        if not key:
+            continue
+        if len(val) >= 2 and (val[0], val[-1]) in _QUOTE_PAIRS:
+            val = val[1:-1].strip()
+        out[key] = val
+    return out
+
+
+def _read_dotenv(file_path: str) -> tuple[int, str]:
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        st = os.fstat(fd)
+        chunks = [os.read(fd, st.st_size + 1)]
+        while chunks[-1]:
+            chunks.append(os.read(fd, 65536))
+    finally:
+        os.close(fd)
+    return st.st_mtime_ns, b"".join(chunks).decode("utf-8")
+
+
+def load_dotenv_file(file_path: str) -> dict[str, str]:
+    try:
+        cached = _CACHED.get(file_path)
+        if cached is not None and cached[0] == os.stat(file_path).st_mtime_ns:
+            return cached[1]
+        mtime_ns, text = _read_dotenv(file_path)
+        out = _parse_dotenv_text(text)
+    except Exception:
+        return {}
+    _CACHED[file_path] = (mtime_ns, out)
+    return out
+
+
+def bootstrap_env() -> None:
+    explicit = str(os.environ.get("MCP_TOOLS_ENV_FILE") or "").strip()
+    env_file = explicit or _ENV_FILE_PATH
+    if env_file in _BOOTSTRAPPED:
+        return
+    with _BOOTSTRAP_LOCK:
+        if env_file in _BOOTSTRAPPED:
+            return
+        for k, v in load_dotenv_file(env_file).items():
+            if k not in os.environ:
+                os.environ[k] = v
+        _BOOTSTRAPPED.add(env_file)
+
+
+def env(name: str) -> str | None:
+    bootstrap_env()
+    v = os.environ.get(name)
+    if not v:
+        return None
+    s = v.strip()
+    return s or None
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="mcp_tools")
+
+
+def submit(fn, *args) -> Future:
+    try:
+        return _EXECUTOR.submit(fn, *args)
+    except RuntimeError:
+        fut: Future = Future()
+        try:
+            fut.set_result(fn(*args))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
@@ -3,74 +3,25 @@
 from __future__ import annotations
 
 import base64
+import functools
 import hashlib
 import ipaddress
-import json
 import math
 import mimetypes
 import os
 import re
 import secrets
 import socket
-import time
 import urllib.parse
-import urllib.request
 
-from tools.limits import enforce_daily_limits
-
-_ENV_BOOTSTRAPPED = False
-
-
-def _load_dotenv_file(file_path: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for raw in f.read().splitlines():
-                line = raw.strip()
-                if not line:
-                    continue
-                if line.startswith("#"):
-                    continue
-                if "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                key = k.strip()
-                if not key:
-                    continue
-                val = v.strip()
-                if len(val) >= 2 and (
-                    (val[0] == val[-1] and val[0] in ("'", '"')) or (val[0] == "`" and val[-1] == "`")
-                ):
-                    val = val[1:-1].strip()
-                out[key] = val
-    except Exception:
-        return {}
-    return out
-
-
-def _bootstrap_env() -> None:
-    global _ENV_BOOTSTRAPPED
-    if _ENV_BOOTSTRAPPED:
-        return
-    _ENV_BOOTSTRAPPED = True
-    explicit = str(os.environ.get("MCP_TOOLS_ENV_FILE") or "").strip()
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    env_file = explicit or os.path.join(root, ".env")
-    if not os.path.exists(env_file):
-        return
-    parsed = _load_dotenv_file(env_file)
-    for k, v in parsed.items():
-        if k not in os.environ:
-            os.environ[k] = v
+import orjson
 
+from tools.env import env as _env
+from tools.executor import submit
+from tools.http_client import shared_session
+from tools.limits import enforce_daily_limits
 
-def _env(name: str) -> str | None:
-    _bootstrap_env()
-    v = os.environ.get(name)
-    if not v:
-        return None
-    s = str(v).strip()
-    return s or None
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
 _MIME_TO_EXT: dict[str, str] = {
@@ -97,9 +48,19 @@ _MIME_TO_EXT: dict[str, str] = {
 MAX_SINGLE_FILE_BYTES = 30 * 1024 * 1024
 MAX_FILES = 10
 
+_SLASHES_RE = re.compile(r"/+")
+_EXT_UNSAFE_RE = re.compile(r"[^a-z0-9]+")
+_NAME_CONTROL_RE = re.compile(r"[\r\n\t]+")
+_NAME_UNSAFE_RE = re.compile(r"[^A-Za-z0-9._ -]+")
+_PREFIX_UNSAFE_RE = re.compile(r"[^A-Za-z0-9._-]+")
+_HTTP_SCHEMES = ("http://", "https://")
+
+_MADE_DIRS: set[str] = set()
+_MADE_DIRS_MAX = 1024
+
 
 def _project_root() -> str:
-    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return _PROJECT_ROOT
 
 
 def _default_save_dir() -> str:
@@ -115,11 +76,13 @@ def _resolve_path_from_root(p: str) -> str:
 
 
 def _sanitize_subdir(raw: str | None) -> str | None:
-    s = str(raw or "").strip()
+    if not raw:
+        return None
+    s = raw.strip() if isinstance(raw, str) else str(raw).strip()
     if not s:
         return None
     s = s.replace("\\", "/")
-    s = re.sub(r"/+", "/", s).strip("/")
+    s = _SLASHES_RE.sub("/", s).strip("/")
     if not s or s in (".", ".."):
         return None
     if ".." in s.split("/"):
@@ -127,19 +90,12 @@ def _sanitize_subdir(raw: str | None) -> str | None:
     return s
 
 
+_CATEGORY_DIRS = {"image": "images", "video": "videos", "audio": "audio", "text": "text", "application": "files"}
+
+
 def _category_dirname(mime: str) -> str:
     top = str(mime or "").split("/", 1)[0].strip().lower()
-    if top == "image":
-        return "images"
-    if top == "video":
-        return "videos"
-    if top == "audio":
-        return "audio"
-    if top == "text":
-        return "text"
-    if top == "application":
-        return "files"
-    return "others"
+    return _CATEGORY_DIRS.get(top, "others")
 
 
 def _resolve_save_dir(mime: str, subdir: str | None) -> str:
@@ -151,24 +107,39 @@ def _resolve_save_dir(mime: str, subdir: str | None) -> str:
     if not sd:
         return base2
     out = os.path.abspath(os.path.join(base2, sd))
-    if os.path.commonpath([base2, out]) != base2:
+    if out != base2 and not out.startswith(base2 + os.sep):
         return base2
     return out
 
 
+def _b64decode_strict(data: str) -> bytes:
+    try:
+        return base64.b64decode(data, validate=True)
+    except ValueError:
+        compact = "".join(data.split())
+        if compact == data:
+            raise
+        return base64.b64decode(compact, validate=True)
+
+
 def _parse_data_url(url: str, *, max_bytes: int = MAX_SINGLE_FILE_BYTES) -> tuple[str, bytes]:
     s = str(url or "").strip()
-    m = re.match(r"^data:(?P<mime>[^;]+);base64,(?P<data>[A-Za-z0-9+/=\s]+)$", s)
-    if not m:
+    head, sep, data = s.partition(",")
+    if not sep or not data or not head.startswith("data:") or not head.endswith(";base64"):
+        raise ValueError("仅支持 data URL（data:<mime>;base64,...）")
+    mime = head[5:-7]
+    if not mime or ";" in mime:
         raise ValueError("仅支持 data URL（data:<mime>;base64,...）")
-    mime = str(m.group("mime") or "").strip().lower()
-    data_b64 = re.sub(r"\s+", "", str(m.group("data") or ""))
+    mime = mime.strip().lower()
+    data_b64 = data
     if max_bytes > 0:
         max_b64_len = int(math.ceil(max_bytes / 3) * 4)
         if len(data_b64) > max_b64_len + 16:
-            raise ValueError("单个文件不能超过 30MB")
+            data_b64 = "".join(data_b64.split())
+            if len(data_b64) > max_b64_len + 16:
+                raise ValueError("单个文件不能超过 30MB")
     try:
-        blob = base64.b64decode(data_b64, validate=True)
+        blob = _b64decode_strict(data_b64)
     except Exception as e:
         raise ValueError(f"base64 解码失败：{e}") from e
     if not blob:
@@ -202,37 +173,57 @@ def _check_public_host(host: str) -> None:
             raise ValueError("不允许访问内网/本机地址")
 
 
-def _fetch_http_url(url: str, *, max_bytes: int = MAX_SINGLE_FILE_BYTES, timeout_s: int = 15) -> tuple[str, bytes]:
+_READ_CHUNK_BYTES = 1024 * 1024
+_FETCH_HEADERS = {"User-Agent": "mcp-tools/1.0", "Accept-Encoding": "identity"}
+
+
+def _fetch_http_url(
+    url: str, *, max_bytes: int = MAX_SINGLE_FILE_BYTES, timeout_s: int = 15, hasher: hashlib._Hash | None = None
+) -> tuple[str, bytes]:
     u = str(url or "").strip()
     parsed = urllib.parse.urlparse(u)
     if parsed.scheme not in ("http", "https"):
         raise ValueError("仅支持 http/https URL")
     _check_public_host(parsed.hostname or "")
 
-    req = urllib.request.Request(u, method="GET", headers={"User-Agent": "mcp-tools/1.0"})
     try:
-        with urllib.request.urlopen(req, timeout=timeout_s) as resp:
+        with shared_session().get(u, headers=_FETCH_HEADERS, timeout=timeout_s, stream=True) as res:
+            res.raise_for_status()
+            resp = res.raw
             ct = str(resp.headers.get("content-type") or "").split(";", 1)[0].strip().lower()
             cl = resp.headers.get("content-length")
+            expected = 0
             try:
-                if cl is not None and int(cl) > max_bytes:
-                    raise ValueError("单个文件不能超过 30MB")
+                if cl is not None:
+                    expected = int(cl)
+                    if expected > max_bytes:
+                        raise ValueError("单个文件不能超过 30MB")
             except ValueError:
                 raise
             except Exception:
                 pass
 
-            chunks: list[bytes] = []
+            blob = bytearray(max(expected, 0))
             total = 0
+            with memoryview(blob) as mv:
+                while total < len(blob):
+                    n = resp.readinto(mv[total : total + _READ_CHUNK_BYTES])
+                    if not n:
+                        break
+                    if hasher is not None:
+                        hasher.update(mv[total : total + n])
+                    total += n
+            if total < len(blob):
+                del blob[total:]
             while True:
-                b = resp.read(64 * 1024)
+                b = resp.read(_READ_CHUNK_BYTES)
                 if not b:
                     break
-                total += len(b)
-                if total > max_bytes:
+                blob += b
+                if hasher is not None:
+                    hasher.update(b)
+                if len(blob) > max_bytes:
                     raise ValueError("单个文件不能超过 30MB")
-                chunks.append(b)
-            blob = b"".join(chunks)
             if not blob:
                 raise ValueError("文件内容为空")
             if not ct:
@@ -245,18 +236,85 @@ def _fetch_http_url(url: str, *, max_bytes: int = MAX_SINGLE_FILE_BYTES, timeout
         raise ValueError(f"下载失败：{e}") from e
 
 
+@functools.lru_cache(maxsize=256)
 def _pick_ext(mime: str) -> str:
     m = str(mime or "").lower()
     known = _MIME_TO_EXT.get(m)
     if known:
         return known
     subtype = m.split("/", 1)[1] if "/" in m else ""
-    subtype = re.sub(r"[^a-z0-9]+", "_", subtype.lower()).strip("_")
+    subtype = _EXT_UNSAFE_RE.sub("_", subtype.lower()).strip("_")
     if not subtype:
         return "bin"
     return subtype[:12] or "bin"
 
 
+def _ensure_dir(path: str) -> None:
+    if path in _MADE_DIRS:
+        return
+    os.makedirs(path, exist_ok=True)
+    if len(_MADE_DIRS) >= _MADE_DIRS_MAX:
+        _MADE_DIRS.clear()
+    _MADE_DIRS.add(path)
+
+
+_WRITE_CHUNK_BYTES = 1024 * 1024
+
+
+def _write_and_hash(path: str, blob: bytes, sha: str | None = None) -> str:
+    h = hashlib.sha256() if sha is None else None
+    mv = memoryview(blob)
+    with open(path, "wb") as f:
+        for i in range(0, len(mv), _WRITE_CHUNK_BYTES):
+            chunk = mv[i : i + _WRITE_CHUNK_BYTES]
+            if h is not None:
+                h.update(chunk)
+            f.write(chunk)
+    return h.hexdigest() if h is not None else sha
+
+
+def _load_item(item: str, max_bytes: int) -> tuple[str, bytes, str | None]:
+    scheme = item[:8].lower()
+    if scheme.startswith("data:"):
+        mime, blob = _parse_data_url(item, max_bytes=max_bytes)
+        return mime, blob, None
+    if scheme.startswith(_HTTP_SCHEMES):
+        h = hashlib.sha256()
+        mime, blob = _fetch_http_url(item, max_bytes=max_bytes, hasher=h)
+        return mime, blob, h.hexdigest()
+    raise ValueError("仅支持 data URL 或 http/https URL")
+
+
+def _store_item(
+    idx: int, count: int, mime: str, blob: bytes, sha: str | None, stem: str, subdir0: str | None
+) -> dict[str, object]:
+    ext = _pick_ext(mime)
+    save_dir = _resolve_save_dir(mime, subdir0)
+    _ensure_dir(save_dir)
+    suffix = f"_{idx + 1}" if count > 1 else ""
+    name = f"{stem}{suffix}.{ext}"
+    path = os.path.join(save_dir, name)
+    tmp = f"{path}.tmp.{os.getpid()}.{secrets.token_hex(4)}"
+    try:
+        try:
+            sha = _write_and_hash(tmp, blob, sha)
+        except FileNotFoundError:
+            _MADE_DIRS.discard(save_dir)
+            _ensure_dir(save_dir)
+            sha = _write_and_hash(tmp, blob, sha)
+        if os.path.exists(path):
+            name = f"{stem}{suffix}_{sha[:8]}.{ext}"
+            path = os.path.join(save_dir, name)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except Exception:
+            pass
+        raise
+    return {"path": path, "mime": mime, "kind": _category_dirname(mime), "bytes": len(blob), "sha256": sha}
+
+
 def save_files(
     inputs: list[str],
     *,
@@ -275,37 +333,25 @@ def save_files(
     base_name = str(filename or "").strip()
     if base_name:
         base_name = os.path.basename(base_name.replace("\\", "/"))
-        base_name = re.sub(r"[\r\n\t]+", " ", base_name).strip()
-        base_name = re.sub(r"[^A-Za-z0-9._ -]+", "_", base_name).strip(" ._-")
+        base_name = _NAME_CONTROL_RE.sub(" ", base_name).strip()
+        base_name = _NAME_UNSAFE_RE.sub("_", base_name).strip(" ._-")
         stem = os.path.splitext(base_name)[0].strip(" ._-")
         if not stem:
             stem = "file_" + secrets.token_hex(4)
     else:
         prefix = str(filename_prefix or "").strip()
-        prefix = re.sub(r"[^A-Za-z0-9._-]+", "_", prefix)[:32].strip(" ._-")
+        prefix = _PREFIX_UNSAFE_RE.sub("_", prefix)[:32].strip(" ._-")
         stem = prefix if prefix else "file_" + secrets.token_hex(4)
 
+    loads = [submit(_load_item, item, max_single_bytes) for item in items] if len(items) > 1 else None
     saved: list[dict[str, object]] = []
-    for idx, item in enumerate(items):
-        if re.match(r"^data:", item, flags=re.I):
-            mime, blob = _parse_data_url(item, max_bytes=max_single_bytes)
-        elif re.match(r"^https?://", item, flags=re.I):
-            mime, blob = _fetch_http_url(item, max_bytes=max_single_bytes)
-        else:
-            raise ValueError("仅支持 data URL 或 http/https URL")
-        sha = hashlib.sha256(blob).hexdigest()
-        ext = _pick_ext(mime)
-        save_dir = _resolve_save_dir(mime, subdir0)
-        os.makedirs(save_dir, exist_ok=True)
-        suffix = f"_{idx + 1}" if len(items) > 1 else ""
-        name = f"{stem}{suffix}.{ext}"
-        path = os.path.join(save_dir, name)
-        if os.path.exists(path):
-            name = f"{stem}{suffix}_{sha[:8]}.{ext}"
-            path = os.path.join(save_dir, name)
-        with open(path, "wb") as f:
-            f.write(blob)
-        saved.append({"path": path, "mime": mime, "kind": _category_dirname(mime), "bytes": len(blob), "sha256": sha})
+    try:
+        for idx, item in enumerate(items):
+            mime, blob, sha = loads[idx].result() if loads else _load_item(item, max_single_bytes)
+            saved.append(_store_item(idx, len(items), mime, blob, sha, stem, subdir0))
+    finally:
+        for load in loads or ():
+            load.cancel()
 
     base = str(_env("FILE_SAVE_DIR") or "").strip() or _default_save_dir()
     base = _resolve_path_from_root(base)
@@ -333,6 +379,6 @@ def register(mcp) -> None:
                 max_single_bytes=MAX_SINGLE_FILE_BYTES,
                 max_files=MAX_FILES,
             )
-            return json.dumps(res, ensure_ascii=False, indent=2)
+            return orjson.dumps(res, option=orjson.OPT_INDENT_2).decode("utf-8")
         except Exception as e:
             return f"错误：{e}"
@@ -1,22 +1,14 @@
 from __future__ import annotations
 
-import os
 import threading
-import time
 
+from tools.env import env as _env
 from tools.gold_price import get_gold_snapshot
 from tools.reminders.napcat_http import NapCatHttpSender
 
 _LOCK = threading.Lock()
 _STARTED = False
-
-
-def _env(name: str) -> str | None:
-    v = os.environ.get(name)
-    if not v:
-        return None
-    s = str(v).strip()
-    return s or None
+_STOP = threading.Event()
 
 
 def _env_bool(name: str, default: bool) -> bool:
@@ -76,7 +68,7 @@ def _loop() -> None:
     interval_s = _env_int("GOLD_ALERT_INTERVAL_S", 60)
 
     baseline: float | None = None
-    while True:
+    while not _STOP.is_set():
         try:
             snap = get_gold_snapshot()
             lbma = snap.get("lbma") if isinstance(snap.get("lbma"), dict) else {}
@@ -94,13 +86,11 @@ def _loop() -> None:
                 picked = ("LBMA", float(current))
 
             if not picked:
-                time.sleep(interval_s)
                 continue
 
             source, current_f = picked
             if baseline is None:
                 baseline = current_f
-                time.sleep(interval_s)
                 continue
 
             delta = current_f - baseline
@@ -118,7 +108,8 @@ def _loop() -> None:
                 baseline = current_f
         except Exception:
             pass
-        time.sleep(interval_s)
+        finally:
+            _STOP.wait(interval_s)
 
 
 def start_gold_alert_monitor() -> None:
@@ -132,3 +123,7 @@ def start_gold_alert_monitor() -> None:
         t = threading.Thread(target=_loop, daemon=True)
         t.start()
         _STARTED = True
+
+
+def stop_gold_alert_monitor() -> None:
+    _STOP.set()
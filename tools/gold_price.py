@@ -5,74 +5,29 @@ Data source: Eastmoney public endpoints (quote + suggest), no API key required.
 
 from __future__ import annotations
 
-import json
-import os
+import math
 import re
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
-from typing import Any
+from typing import Any, Iterator
 
+import orjson
 from mcp.server.fastmcp import FastMCP
 
+from tools.env import env as _env
+from tools.executor import submit
+from tools.http_client import http_get
 from tools.limits import enforce_daily_limits
 
-_ENV_BOOTSTRAPPED = False
-
 TROY_OUNCE_TO_GRAM = 31.1034768
 
+_NUM_JUNK_RE = re.compile(r"[^\d.\-]+")
 
-def _load_dotenv_file(file_path: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for raw in f.read().splitlines():
-                line = raw.strip()
-                if not line:
-                    continue
-                if line.startswith("#"):
-                    continue
-                if "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                key = k.strip()
-                if not key:
-                    continue
-                val = v.strip()
-                if len(val) >= 2 and (
-                    (val[0] == val[-1] and val[0] in ("'", '"')) or (val[0] == "`" and val[-1] == "`")
-                ):
-                    val = val[1:-1].strip()
-                out[key] = val
-    except Exception:
-        return {}
-    return out
-
-
-def _bootstrap_env() -> None:
-    global _ENV_BOOTSTRAPPED
-    if _ENV_BOOTSTRAPPED:
-        return
-    _ENV_BOOTSTRAPPED = True
-    explicit = str(os.environ.get("MCP_TOOLS_ENV_FILE") or "").strip()
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    env_file = explicit or os.path.join(root, ".env")
-    if not os.path.exists(env_file):
-        return
-    parsed = _load_dotenv_file(env_file)
-    for k, v in parsed.items():
-        if k not in os.environ:
-            os.environ[k] = v
-
-
-def _env(name: str) -> str | None:
-    _bootstrap_env()
-    v = os.environ.get(name)
-    if not v:
-        return None
-    s = str(v).strip()
-    return s or None
+_EM_FIELDS = "f57,f58,f43,f44,f45,f46,f60,f169,f170,f171,f168,f124"
+_EM_QUOTE_URL_TMPL = "https://push2.eastmoney.com/api/qt/stock/get?secid={secid}&" + urllib.parse.urlencode(
+    {"fields": _EM_FIELDS, "ut": "fa5fd1943c7b386f172d6893dbfba10b"}
+)
+_EM_HEADERS = {"User-Agent": "Mozilla/5.0", "Referer": "https://quote.eastmoney.com/"}
 
 
 def _env_float(name: str) -> float | None:
@@ -86,38 +41,30 @@ def _env_float(name: str) -> float | None:
         return None
 
 
-def _http_get(url: str, *, headers: dict[str, str] | None = None, timeout_s: float = 15.0) -> tuple[int, bytes]:
-    req = urllib.request.Request(url, method="GET")
-    if headers:
-        for k, v in headers.items():
-            req.add_header(k, v)
-    try:
-        with urllib.request.urlopen(req, timeout=timeout_s) as res:
-            return int(res.status), res.read()
-    except urllib.error.HTTPError as e:
-        return int(e.code), e.read()
-
-
 def _http_get_json(url: str, *, headers: dict[str, str] | None = None, timeout_s: float = 15.0) -> Any:
-    status, body = _http_get(url, headers=headers, timeout_s=timeout_s)
+    status, body = http_get(url, headers=headers, timeout_s=timeout_s)
+    if status < 200 or status >= 300:
+        raise RuntimeError(f"HTTP {status} {body[:500].decode('utf-8', errors='replace')}")
     parsed: Any
     try:
-        parsed = json.loads(body.decode("utf-8"))
+        parsed = orjson.loads(body)
     except Exception:
         parsed = body.decode("utf-8", errors="replace")
-    if status < 200 or status >= 300:
-        raise RuntimeError(f"HTTP {status} {json.dumps(parsed, ensure_ascii=False) if not isinstance(parsed, str) else parsed}")
     return parsed
 
 
 def _parse_number(v: Any) -> float | None:
     if v is None:
         return None
+    if type(v) is int:
+        return float(v)
+    if type(v) is float:
+        return v if math.isfinite(v) else None
     s = str(v).strip()
     if not s:
         return None
     s = s.replace(",", "")
-    s = re.sub(r"[^\d.\-]+", "", s)
+    s = _NUM_JUNK_RE.sub("", s)
     if not s or s in ("-", ".", "-."):
         return None
     try:
@@ -157,34 +104,12 @@ def _get_usdcny_rate() -> float:
     return float(x)
 
 
+def _em_quote_url(secid: str) -> str:
+    return _EM_QUOTE_URL_TMPL.format(secid=urllib.parse.quote_plus(secid, safe=""))
+
+
 def _em_get_quote(secid: str) -> dict[str, Any]:
-    fields = ",".join(
-        [
-            "f57",
-            "f58",
-            "f43",
-            "f44",
-            "f45",
-            "f46",
-            "f60",
-            "f169",
-            "f170",
-            "f171",
-            "f168",
-            "f124",
-        ]
-    )
-    url = (
-        "https://push2.eastmoney.com/api/qt/stock/get?"
-        + urllib.parse.urlencode(
-            {
-                "secid": secid,
-                "fields": fields,
-                "ut": "fa5fd1943c7b386f172d6893dbfba10b",
-            }
-        )
-    )
-    parsed = _http_get_json(url, headers={"User-Agent": "Mozilla/5.0", "Referer": "https://quote.eastmoney.com/"}, timeout_s=15.0)
+    parsed = _http_get_json(_em_quote_url(secid), headers=_EM_HEADERS, timeout_s=15.0)
     if not isinstance(parsed, dict):
         raise RuntimeError("行情服务返回异常")
     data = parsed.get("data")
@@ -236,35 +161,31 @@ def _em_quote_to_fields(data: dict[str, Any]) -> dict[str, Any]:
     }
 
 
-def _format_usd_block(*, title: str, q: dict[str, Any]) -> list[str]:
+def _format_usd_block(*, title: str, q: dict[str, Any]) -> Iterator[str]:
     price = q.get("price")
     high = q.get("high")
     low = q.get("low")
     ch = q.get("change")
     chp = q.get("change_pct")
-    lines: list[str] = []
-    lines.append("💵 美元计价:")
+    yield "💵 美元计价:"
     if isinstance(price, (int, float)) and price > 0:
-        lines.append(f"    最新价: {price:.2f} 美元/盎司")
-        lines.append(f"    涨跌: {_format_change(ch, chp, '美元/盎司')}")
+        yield f"    最新价: {price:.2f} 美元/盎司"
+        yield f"    涨跌: {_format_change(ch, chp, '美元/盎司')}"
         if isinstance(high, (int, float)) and isinstance(low, (int, float)) and high > 0 and low > 0:
-            lines.append(f"    最高/最低: {high:.2f} / {low:.2f}")
+            yield f"    最高/最低: {high:.2f} / {low:.2f}"
     else:
-        lines.append("    最新价: —")
-    return lines
+        yield "    最新价: —"
 
 
-def _format_cny_block(*, title: str, usd_oz: float, usdcny: float) -> list[str]:
+def _format_cny_block(*, title: str, usd_oz: float, usdcny: float) -> Iterator[str]:
     cny_oz = usd_oz * usdcny
     cny_g = cny_oz / TROY_OUNCE_TO_GRAM
-    return [
-        f"💴 人民币计价 (汇率: {usdcny:.4f}):",
-        f"    每盎司: {cny_oz:.2f} 元",
-        f"    每克: {cny_g:.2f} 元",
-    ]
+    yield f"💴 人民币计价 (汇率: {usdcny:.4f}):"
+    yield f"    每盎司: {cny_oz:.2f} 元"
+    yield f"    每克: {cny_g:.2f} 元"
 
 
-def _format_sge_blocks(*, title: str, cny_g: float, q: dict[str, Any], usdcny: float) -> list[str]:
+def _format_sge_blocks(*, title: str, cny_g: float, q: dict[str, Any], usdcny: float) -> Iterator[str]:
     cny_oz = cny_g * TROY_OUNCE_TO_GRAM
     usd_oz = cny_oz / usdcny
     usd_g = cny_g / usdcny
@@ -272,26 +193,26 @@ def _format_sge_blocks(*, title: str, cny_g: float, q: dict[str, Any], usdcny: f
     low = q.get("low")
     ch = q.get("change")
     chp = q.get("change_pct")
-    out: list[str] = []
-    out.append("💴 人民币计价:")
-    out.append(f"    最新价: {cny_g:.2f} 元/克")
-    out.append(f"    涨跌: {_format_change(ch, chp, '元/克')}")
+    yield "💴 人民币计价:"
+    yield f"    最新价: {cny_g:.2f} 元/克"
+    yield f"    涨跌: {_format_change(ch, chp, '元/克')}"
     if isinstance(high, (int, float)) and isinstance(low, (int, float)) and high > 0 and low > 0:
-        out.append(f"    最高/最低: {high:.2f} / {low:.2f} 元/克")
-    out.append(f"💵 美元计价 (汇率: {usdcny:.4f}):")
-    out.append(f"    每盎司: {usd_oz:.2f} 美元/盎司")
-    out.append(f"    每克: {usd_g:.2f} 美元/克")
-    return out
+        yield f"    最高/最低: {high:.2f} / {low:.2f} 元/克"
+    yield f"💵 美元计价 (汇率: {usdcny:.4f}):"
+    yield f"    每盎司: {usd_oz:.2f} 美元/盎司"
+    yield f"    每克: {usd_g:.2f} 美元/克"
 
 
 def get_gold_snapshot() -> dict[str, Any]:
-    usdcny = _get_usdcny_rate()
-
     lbma_secid = str(_env("GOLD_LONDON_EM_SECID") or "122.XAU").strip() or "122.XAU"
     sge_secid = str(_env("GOLD_SGE_EM_SECID") or "118.SHAU").strip() or "118.SHAU"
 
-    lbma_raw = _em_get_quote(lbma_secid)
-    sge_raw = _em_get_quote(sge_secid)
+    usdcny_fut = submit(_get_usdcny_rate)
+    lbma_fut = submit(_em_get_quote, lbma_secid)
+    sge_fut = submit(_em_get_quote, sge_secid)
+    usdcny = usdcny_fut.result()
+    lbma_raw = lbma_fut.result()
+    sge_raw = sge_fut.result()
 
     lbma_q = _em_quote_to_fields(lbma_raw)
     sge_q = _em_quote_to_fields(sge_raw)
@@ -322,27 +243,29 @@ def get_gold_snapshot() -> dict[str, Any]:
     }
 
 
-def format_gold_snapshot(snapshot: dict[str, Any]) -> str:
+def _iter_gold_lines(snapshot: dict[str, Any]) -> Iterator[str]:
     usdcny = float(snapshot.get("usdcny") or 0.0)
     lbma_q = snapshot.get("lbma") if isinstance(snapshot.get("lbma"), dict) else {}
     sge_q = snapshot.get("sge") if isinstance(snapshot.get("sge"), dict) else {}
     ts = str(snapshot.get("timestamp") or "").strip() or time.strftime("%Y-%m-%d %H:%M:%S")
-    lines: list[str] = []
 
-    lines.append(f"LBMA（伦敦金/现货参考：{str(lbma_q.get('name') or '—')}）")
-    lines.extend(_format_usd_block(title="", q=lbma_q))
+    yield f"LBMA（伦敦金/现货参考：{str(lbma_q.get('name') or '—')}）"
+    yield from _format_usd_block(title="", q=lbma_q)
     if isinstance(lbma_q.get("usd_oz"), (int, float)) and lbma_q["usd_oz"] > 0 and usdcny > 0:
-        lines.extend(_format_cny_block(title="", usd_oz=float(lbma_q["usd_oz"]), usdcny=usdcny))
-    lines.append("")
+        yield from _format_cny_block(title="", usd_oz=float(lbma_q["usd_oz"]), usdcny=usdcny)
+    yield ""
 
-    lines.append(f"SGE（上海黄金交易所：{str(sge_q.get('name') or '—')}）")
+    yield f"SGE（上海黄金交易所：{str(sge_q.get('name') or '—')}）"
     if isinstance(sge_q.get("cny_g"), (int, float)) and sge_q["cny_g"] > 0 and usdcny > 0:
-        lines.extend(_format_sge_blocks(title="", cny_g=float(sge_q["cny_g"]), q=sge_q, usdcny=usdcny))
+        yield from _format_sge_blocks(title="", cny_g=float(sge_q["cny_g"]), q=sge_q, usdcny=usdcny)
     else:
-        lines.append("  当前未返回有效最新价（可能非交易时段或数据源暂不可用）")
-    lines.append("")
-    lines.append(f"生成时间: {ts}")
-    return "\n".join([x.rstrip() for x in lines]).strip()
+        yield "  当前未返回有效最新价（可能非交易时段或数据源暂不可用）"
+    yield ""
+    yield f"生成时间: {ts}"
+
+
+def format_gold_snapshot(snapshot: dict[str, Any]) -> str:
+    return "\n".join(_iter_gold_lines(snapshot)).strip()
 
 
 def get_realtime_gold_prices() -> str:
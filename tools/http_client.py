@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import atexit
+
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def new_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_SESSION = new_session()
+atexit.register(_SESSION.close)
+
+
+def shared_session() -> requests.Session:
+    return _SESSION
+
+
+def http_get(url: str, *, headers: dict[str, str] | None = None, timeout_s: float = 15.0) -> tuple[int, bytes]:
+    res = _SESSION.get(url, headers=headers, timeout=timeout_s)
+    return int(res.status_code), res.content
+
+
+def http_post_json(url: str, payload: dict, headers: dict[str, str], timeout_s: float = 15.0) -> tuple[int, bytes]:
+    data = orjson.dumps(payload)
+    res = _SESSION.post(url, data=data, headers=headers, timeout=timeout_s)
+    return int(res.status_code), res.content
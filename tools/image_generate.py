@@ -1,73 +1,28 @@
 from __future__ import annotations
 
-import json
+import functools
 import os
+from concurrent.futures import Future
 from pathlib import Path
 from urllib.parse import unquote, urlparse
 
+import orjson
 import requests
 from openai import OpenAI
 
+from tools.env import env as _env
+from tools.executor import submit
+from tools.http_client import shared_session
 from tools.limits import enforce_daily_limits
 
-_ENV_BOOTSTRAPPED = False
-MAX_IMAGES = 4
-
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-def _load_dotenv_file(file_path: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for raw in f.read().splitlines():
-                line = raw.strip()
-                if not line:
-                    continue
-                if line.startswith("#"):
-                    continue
-                if "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                key = k.strip()
-                if not key:
-                    continue
-                val = v.strip()
-                if len(val) >= 2 and (
-                    (val[0] == val[-1] and val[0] in ("'", '"')) or (val[0] == "`" and val[-1] == "`")
-                ):
-                    val = val[1:-1].strip()
-                out[key] = val
-    except Exception:
-        return {}
-    return out
-
-
-def _bootstrap_env() -> None:
-    global _ENV_BOOTSTRAPPED
-    if _ENV_BOOTSTRAPPED:
-        return
-    _ENV_BOOTSTRAPPED = True
-    explicit = str(os.environ.get("MCP_TOOLS_ENV_FILE") or "").strip()
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    env_file = explicit or os.path.join(root, ".env")
-    if not os.path.exists(env_file):
-        return
-    parsed = _load_dotenv_file(env_file)
-    for k, v in parsed.items():
-        if k not in os.environ:
-            os.environ[k] = v
-
-
-def _env(name: str) -> str | None:
-    _bootstrap_env()
-    v = os.environ.get(name)
-    if not v:
-        return None
-    s = str(v).strip()
-    return s or None
+MAX_IMAGES = 4
+_DOWNLOAD_CHUNK_BYTES = 1024 * 1024
 
 
 def _project_root() -> str:
-    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return _PROJECT_ROOT
 
 
 def _default_output_dir() -> Path:
@@ -87,12 +42,25 @@ def _resolve_output_dir(subdir: str | None) -> Path:
     if not sd or sd in (".", "..") or ".." in sd.split("/"):
         return base
     out = (base / sd).resolve()
+    out_s = str(out)
+    if out_s == str(base) or out_s.startswith(os.path.join(str(base), "")):
+        return out
+    return base
+
+
+def _write_response(resp: requests.Response, filepath: Path, mode: str) -> None:
     try:
-        if out == base or base in out.parents:
-            return out
+        with open(filepath, mode) as f:
+            for chunk in resp.iter_content(chunk_size=_DOWNLOAD_CHUNK_BYTES):
+                f.write(chunk)
+    except FileExistsError:
+        raise
     except Exception:
-        return base
-    return base
+        try:
+            filepath.unlink()
+        except Exception:
+            pass
+        raise
 
 
 def download_image(url: str, save_dir: Path, session: requests.Session, index: int = 0) -> Path:
@@ -105,16 +73,19 @@ def download_image(url: str, save_dir: Path, session: requests.Session, index: i
 
     filepath = save_dir / filename
 
-    if filepath.exists():
-        stem = filepath.stem
-        suffix = filepath.suffix
-        filepath = save_dir / f"{stem}_{index}{suffix}"
+    with session.get(url, timeout=30, stream=True) as resp:
+        resp.raise_for_status()
+        try:
+            _write_response(resp, filepath, "xb")
+        except FileExistsError:
+            filepath = save_dir / f"{filepath.stem}_{index}{filepath.suffix}"
+            _write_response(resp, filepath, "wb")
+    return filepath
 
-    resp = session.get(url, timeout=30)
-    resp.raise_for_status()
 
-    filepath.write_bytes(resp.content)
-    return filepath
+@functools.lru_cache(maxsize=4)
+def _client_for(base_url: str, api_key: str) -> OpenAI:
+    return OpenAI(base_url=base_url, api_key=api_key)
 
 
 def generate_images(
@@ -128,7 +99,7 @@ def generate_images(
     n: int,
     watermark: bool,
 ) -> list[Path]:
-    client = OpenAI(base_url=base_url, api_key=api_key)
+    client = _client_for(base_url, api_key)
     try:
         response = client.images.generate(
             model=model,
@@ -141,14 +112,14 @@ def generate_images(
     except Exception as e:
         raise RuntimeError(f"Image generation failed: {e}") from e
 
-    saved_files: list[Path] = []
-    with requests.Session() as session:
-        for i, item in enumerate(getattr(response, "data", []) or []):
-            u = str(getattr(item, "url", "") or "").strip()
-            if not u:
-                continue
-            path = download_image(u, save_dir, session, index=i)
-            saved_files.append(path)
+    session = shared_session()
+    downloads: list[Future] = []
+    for i, item in enumerate(getattr(response, "data", []) or []):
+        u = str(getattr(item, "url", "") or "").strip()
+        if not u:
+            continue
+        downloads.append(submit(download_image, u, save_dir, session, i))
+    saved_files = [f.result() for f in downloads]
     if not saved_files:
         raise RuntimeError("Image generation failed: empty output")
     return saved_files
@@ -199,7 +170,7 @@ def register(mcp) -> None:
                 n=n0,
                 watermark=watermark if w_raw is not None else True,
             )
-            return json.dumps(
+            return orjson.dumps(
                 {
                     "base_url": base_url,
                     "model": model,
@@ -208,8 +179,7 @@ def register(mcp) -> None:
                     "saved_dir": str(out_dir),
                     "files": [{"path": str(p)} for p in files],
                 },
-                ensure_ascii=False,
-                indent=2,
-            )
+                option=orjson.OPT_INDENT_2,
+            ).decode("utf-8")
         except Exception as e:
             return f"错误：{e}"
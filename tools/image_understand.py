@@ -2,70 +2,17 @@
 
 from __future__ import annotations
 
-import json
-import os
-import urllib.error
+import functools
+import itertools
 import urllib.parse
-import urllib.request
 
+import orjson
 from mcp.server.fastmcp import FastMCP
 
+from tools.env import env as _env
+from tools.http_client import http_post_json
 from tools.limits import enforce_daily_limits
 
-_ENV_BOOTSTRAPPED = False
-
-
-def _load_dotenv_file(file_path: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for raw in f.read().splitlines():
-                line = raw.strip()
-                if not line:
-                    continue
-                if line.startswith("#"):
-                    continue
-                if "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                key = k.strip()
-                if not key:
-                    continue
-                val = v.strip()
-                if len(val) >= 2 and (
-                    (val[0] == val[-1] and val[0] in ("'", '"')) or (val[0] == "`" and val[-1] == "`")
-                ):
-                    val = val[1:-1].strip()
-                out[key] = val
-    except Exception:
-        return {}
-    return out
-
-
-def _bootstrap_env() -> None:
-    global _ENV_BOOTSTRAPPED
-    if _ENV_BOOTSTRAPPED:
-        return
-    _ENV_BOOTSTRAPPED = True
-    explicit = str(os.environ.get("MCP_TOOLS_ENV_FILE") or "").strip()
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    env_file = explicit or os.path.join(root, ".env")
-    if not os.path.exists(env_file):
-        return
-    parsed = _load_dotenv_file(env_file)
-    for k, v in parsed.items():
-        if k not in os.environ:
-            os.environ[k] = v
-
-
-def _env(name: str) -> str | None:
-    _bootstrap_env()
-    v = os.environ.get(name)
-    if not v:
-        return None
-    s = str(v).strip()
-    return s or None
-
 
 def _env_int(name: str, default: int) -> int:
     v = _env(name)
@@ -78,24 +25,20 @@ def _env_int(name: str, default: int) -> int:
         return default
 
 
-def _http_post_json(url: str, payload: dict, headers: dict[str, str], timeout_s: float = 15.0) -> tuple[int, bytes]:
-    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-    req = urllib.request.Request(url, data=data, method="POST")
-    for k, v in headers.items():
-        req.add_header(k, v)
-    try:
-        with urllib.request.urlopen(req, timeout=timeout_s) as res:
-            return int(res.status), res.read()
-    except urllib.error.HTTPError as e:
-        return int(e.code), e.read()
+def _data_url_decoded_size(url: str) -> int | None:
+    i = url.find(",")
+    if i < 0:
+        return None
+    head = url[:i].lower()
+    if not head.startswith("data:image/") or not head.endswith(";base64") or ";" in head[11:-7] or len(head) <= 18:
+        return None
+    return (len(url) - i - 1) * 3 // 4
 
 
 def _normalize_base_url(raw: str | None) -> str | None:
-    s = str(raw or "").strip()
-    if not s:
+    if not raw:
         return None
-    s = s.strip().strip('"').strip("'").strip("`").strip()
-    return s.rstrip("/")
+    return raw.strip().strip('"').strip("'").strip("`").strip().rstrip("/")
 
 
 def _join_url(base: str, path: str) -> str:
@@ -104,29 +47,30 @@ def _join_url(base: str, path: str) -> str:
     return urllib.parse.urljoin(base, path.lstrip("/"))
 
 
+@functools.lru_cache(maxsize=4)
+def _chat_endpoint(base_url: str) -> str:
+    return _join_url(base_url, "chat/completions")
+
+
+@functools.lru_cache(maxsize=4)
+def _auth_headers(api_key: str) -> dict[str, str]:
+    return {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
+
+
 def _extract_text_from_chat_response(parsed: object) -> str:
-    if not isinstance(parsed, dict):
-        return ""
-    choices = parsed.get("choices")
-    if not isinstance(choices, list) or not choices:
-        return ""
-    first = choices[0]
-    if not isinstance(first, dict):
-        return ""
-    msg = first.get("message")
-    if not isinstance(msg, dict):
+    try:
+        content = parsed["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
         return ""
-    content = msg.get("content")
     if isinstance(content, str):
         return content.strip()
     if isinstance(content, list):
-        parts: list[str] = []
-        for p in content:
-            if not isinstance(p, dict):
-                continue
-            if p.get("type") == "text" and isinstance(p.get("text"), str):
-                parts.append(p["text"])
-        return "\n".join([x.strip() for x in parts if str(x).strip()]).strip()
+        texts = (
+            p["text"].strip()
+            for p in content
+            if isinstance(p, dict) and p.get("type") == "text" and isinstance(p.get("text"), str)
+        )
+        return "\n".join(t for t in texts if t)
     return ""
 
 
@@ -144,8 +88,7 @@ def register(mcp: FastMCP) -> None:
         except Exception as e:
             return f"错误：{e}"
 
-        imgs = [str(x).strip() for x in (images or []) if str(x or "").strip()]
-        imgs = imgs[:3]
+        imgs = list(itertools.islice((s for x in (images or []) if (s := str(x or "").strip())), 3))
         prompt0 = str(prompt or "").strip()
         if not imgs:
             return "错误：images 不能为空"
@@ -156,14 +99,17 @@ def register(mcp: FastMCP) -> None:
         if not base_url or not api_key:
             return "缺少识图配置：请在 .env 设置 VLM_UNDERSTAND_BASE_URL / VLM_UNDERSTAND_API_KEY / VLM_UNDERSTAND_MODEL"
 
-        endpoint = _join_url(base_url, "chat/completions")
-        content: list[dict] = []
-        if prompt0:
-            content.append({"type": "text", "text": prompt0})
-        else:
-            content.append({"type": "text", "text": "请描述图片内容，并指出关键细节。"})
-        for d in imgs:
-            content.append({"type": "image_url", "image_url": {"url": d}})
+        max_image_bytes = _env_int("VLM_UNDERSTAND_MAX_IMAGE_BYTES", 10 * 1024 * 1024)
+        for i, d in enumerate(imgs):
+            size = _data_url_decoded_size(d)
+            if size is not None and size > max_image_bytes:
+                return f"错误：第 {i + 1} 张图片过大（约 {size} 字节，上限 {max_image_bytes} 字节）"
+
+        endpoint = _chat_endpoint(base_url)
+        content: list[dict] = [
+            {"type": "text", "text": prompt0 or "请描述图片内容，并指出关键细节。"},
+            *({"type": "image_url", "image_url": {"url": d}} for d in imgs),
+        ]
 
         payload = {
             "model": model,
@@ -171,14 +117,13 @@ def register(mcp: FastMCP) -> None:
             "max_tokens": _env_int("VLM_UNDERSTAND_MAX_TOKENS", 2048),
             "messages": [{"role": "user", "content": content}],
         }
-        headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
-        status, body = _http_post_json(endpoint, payload, headers, timeout_s=40.0)
+        status, body = http_post_json(endpoint, payload, _auth_headers(api_key), timeout_s=40.0)
+        if status < 200 or status >= 300:
+            return f"识图失败：HTTP {status} {body[:500].decode('utf-8', errors='replace')}"
         parsed: object | None
         try:
-            parsed = json.loads(body.decode("utf-8"))
+            parsed = orjson.loads(body)
         except Exception:
             parsed = None
-        if status < 200 or status >= 300:
-            return f"识图失败：HTTP {status} {json.dumps(parsed, ensure_ascii=False)}"
         text = _extract_text_from_chat_response(parsed)
         return text or "识图失败：无可用输出"
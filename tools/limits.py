@@ -1,17 +1,32 @@
 from __future__ import annotations
 
-import json
+import datetime as dt
+import functools
 import os
+import threading
 import time
 from typing import Any
 from zoneinfo import ZoneInfo
 
+import orjson
+
+from tools.tz import get_zoneinfo_or_default
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 _CACHED: dict[str, Any] | None = None
 _CACHED_MTIME: float | None = None
+_CACHED_PATH: str | None = None
+_CACHED_CHECKED_AT = 0.0
+_CHECK_TTL_S = 5.0
+_USAGE_CACHE: dict[str, tuple[tuple[int, int, int], dict[str, Any]]] = {}
+_USAGE_LOCK = threading.Lock()
+_DAY_KEY_CACHE: tuple[ZoneInfo, int, str] | None = None
+_RULES_CACHE: tuple[dict[str, Any], dict[str, tuple[int | None, int | None]]] | None = None
 
 
 def _project_root() -> str:
-    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return _PROJECT_ROOT
 
 
 def _default_limits_file() -> str:
@@ -21,6 +36,7 @@ def _default_limits_file() -> str:
 def _default_usage_file() -> str:
     return os.path.join(_project_root(), "data", "tool_usage.json")
 
+@functools.lru_cache(maxsize=16)
 def _resolve_path_from_root(p: str) -> str:
     raw = str(p or "").strip()
     expanded = os.path.expanduser(raw)
@@ -31,8 +47,8 @@ def _resolve_path_from_root(p: str) -> str:
 
 def _load_json_file(path: str) -> dict[str, Any] | None:
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            v = json.load(f)
+        with open(path, "rb") as f:
+            v = orjson.loads(f.read())
         return v if isinstance(v, dict) else None
     except Exception:
         return None
@@ -41,49 +57,80 @@ def _load_json_file(path: str) -> dict[str, Any] | None:
 def _atomic_write_json(path: str, obj: dict[str, Any]) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
     tmp = f"{path}.tmp.{os.getpid()}"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    with open(tmp, "wb") as f:
+        f.write(orjson.dumps(obj))
     os.replace(tmp, path)
 
 
 def _get_timezone(cfg: dict[str, Any]) -> ZoneInfo:
     tz = str(cfg.get("timezone") or "").strip() or str(os.environ.get("TIMEZONE") or "").strip() or "Asia/Shanghai"
-    try:
-        return ZoneInfo(tz)
-    except Exception:
-        return ZoneInfo("Asia/Shanghai")
+    return get_zoneinfo_or_default(tz)
 
 
 def load_limits_config() -> dict[str, Any] | None:
-    global _CACHED, _CACHED_MTIME
+    global _CACHED, _CACHED_MTIME, _CACHED_PATH, _CACHED_CHECKED_AT
     path0 = str(os.environ.get("MCP_LIMITS_FILE") or "").strip() or _default_limits_file()
     path = _resolve_path_from_root(path0)
-    if not os.path.exists(path):
+    now = time.monotonic()
+    if path == _CACHED_PATH and now - _CACHED_CHECKED_AT < _CHECK_TTL_S:
+        return _CACHED
+    _CACHED_PATH = path
+    _CACHED_CHECKED_AT = now
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
         _CACHED = None
         _CACHED_MTIME = None
         return None
-    try:
-        mtime = os.path.getmtime(path)
-    except Exception:
-        mtime = None
-    if _CACHED is not None and _CACHED_MTIME is not None and mtime is not None and mtime == _CACHED_MTIME:
+    if _CACHED is not None and _CACHED_MTIME is not None and mtime == _CACHED_MTIME:
         return _CACHED
     cfg = _load_json_file(path)
     _CACHED = cfg
-    _CACHED_MTIME = mtime if mtime is not None else None
+    _CACHED_MTIME = mtime
     return cfg
 
 
+def _rule_int(v: Any) -> int | None:
+    try:
+        return int(v) if v is not None else None
+    except Exception:
+        return None
+
+
+def _active_rules(cfg: dict[str, Any]) -> dict[str, tuple[int | None, int | None]]:
+    global _RULES_CACHE
+    cached = _RULES_CACHE
+    if cached is not None and cached[0] is cfg:
+        return cached[1]
+    rules: dict[str, tuple[int | None, int | None]] = {}
+    limits = cfg.get("limits")
+    if isinstance(limits, dict):
+        for tn, rule in limits.items():
+            if not tn or not isinstance(rule, dict) or not rule:
+                continue
+            per_day_n = _rule_int(rule.get("per_day"))
+            per_user_n = _rule_int(rule.get("per_user_per_day"))
+            if (per_day_n is None or per_day_n <= 0) and (per_user_n is None or per_user_n <= 0):
+                continue
+            rules[tn] = (per_day_n, per_user_n)
+    _RULES_CACHE = (cfg, rules)
+    return rules
+
+
 def _today_key(tz: ZoneInfo) -> str:
+    global _DAY_KEY_CACHE
     now = time.time()
-    local = time.localtime(now)
+    minute = int(now // 60)
+    cached = _DAY_KEY_CACHE
+    if cached is not None and cached[0] is tz and cached[1] == minute:
+        return cached[2]
     try:
-        import datetime as dt
-
         local_dt = dt.datetime.fromtimestamp(now, tz=tz)
-        return local_dt.strftime("%Y-%m-%d")
+        key = f"{local_dt.year:04d}-{local_dt.month:02d}-{local_dt.day:02d}"
     except Exception:
-        return time.strftime("%Y-%m-%d", local)
+        return time.strftime("%Y-%m-%d", time.localtime(now))
+    _DAY_KEY_CACHE = (tz, minute, key)
+    return key
 
 
 def _usage_path() -> str:
@@ -91,8 +138,20 @@ def _usage_path() -> str:
     return _resolve_path_from_root(path0)
 
 
+def _usage_stat_key(path: str) -> tuple[int, int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
 def _load_usage() -> dict[str, Any]:
     path = _usage_path()
+    key = _usage_stat_key(path)
+    cached = _USAGE_CACHE.get(path)
+    if key is not None and cached is not None and cached[0] == key:
+        return cached[1]
     v = _load_json_file(path)
     if not v:
         return {"days": {}}
@@ -102,42 +161,20 @@ def _load_usage() -> dict[str, Any]:
 
 
 def _save_usage(usage: dict[str, Any]) -> None:
-    _atomic_write_json(_usage_path(), usage)
-
-
-def enforce_daily_limits(*, tool_name: str, chat_type: str | None = None, user_id: str | None = None, group_id: str | None = None) -> None:
-    cfg = load_limits_config()
-    if not cfg:
-        return
-    limits = cfg.get("limits")
-    if not isinstance(limits, dict) or not limits:
-        return
-
-    tn = str(tool_name or "").strip()
-    if not tn:
-        return
-    rule = limits.get(tn)
-    if not isinstance(rule, dict) or not rule:
-        return
-
-    per_day = rule.get("per_day")
-    per_user_per_day = rule.get("per_user_per_day")
-    try:
-        per_day_n = int(per_day) if per_day is not None else None
-    except Exception:
-        per_day_n = None
+    path = _usage_path()
     try:
-        per_user_n = int(per_user_per_day) if per_user_per_day is not None else None
+        _atomic_write_json(path, usage)
     except Exception:
-        per_user_n = None
+        _USAGE_CACHE.pop(path, None)
+        raise
+    key = _usage_stat_key(path)
+    if key is None:
+        _USAGE_CACHE.pop(path, None)
+    else:
+        _USAGE_CACHE[path] = (key, usage)
 
-    if (per_day_n is None or per_day_n <= 0) and (per_user_n is None or per_user_n <= 0):
-        return
-
-    tz = _get_timezone(cfg)
-    day = _today_key(tz)
-    uid = str(user_id or "").strip() or "unknown"
 
+def _count_usage(tn: str, day: str, uid: str, per_day_n: int | None, per_user_n: int | None) -> None:
     usage = _load_usage()
     days = usage.get("days")
     if not isinstance(days, dict):
@@ -170,3 +207,26 @@ def enforce_daily_limits(*, tool_name: str, chat_type: str | None = None, user_i
     days[day] = day_obj
     usage["days"] = days
     _save_usage(usage)
+
+
+def enforce_daily_limits(*, tool_name: str, chat_type: str | None = None, user_id: str | None = None, group_id: str | None = None) -> None:
+    cfg = load_limits_config()
+    if not cfg:
+        return
+    rules = _active_rules(cfg)
+    if not rules:
+        return
+
+    tn = str(tool_name or "").strip()
+    rule = rules.get(tn)
+    if rule is None:
+        return
+    per_day_n, per_user_n = rule
+
+    tz = _get_timezone(cfg)
+    day = _today_key(tz)
+    uid = str(user_id or "").strip() or "unknown"
+
+    with _USAGE_LOCK:
+        _count_usage(tn, day, uid, per_day_n, per_user_n)
+
@@ -1,72 +1,13 @@
-import json
+import functools
 import os
 import urllib.parse
-import urllib.error
-import urllib.request
 
-_ENV_BOOTSTRAPPED = False
+import orjson
+import requests
+from urllib3.exceptions import NewConnectionError
 
-
-def _load_dotenv_file(file_path: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for raw in f.read().splitlines():
-                line = raw.strip()
-                if not line:
-                    continue
-                if line.startswith("#"):
-                    continue
-                if "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                key = k.strip()
-                if not key:
-                    continue
-                val = v.strip()
-                if len(val) >= 2 and ((val[0] == val[-1] and val[0] in ("'", '"')) or (val[0] == "`" and val[-1] == "`")):
-                    val = val[1:-1].strip()
-                out[key] = val
-    except Exception:
-        return {}
-    return out
-
-
-def _bootstrap_env() -> None:
-    global _ENV_BOOTSTRAPPED
-    if _ENV_BOOTSTRAPPED:
-        return
-    _ENV_BOOTSTRAPPED = True
-    explicit = str(os.environ.get("MCP_TOOLS_ENV_FILE") or "").strip()
-    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    env_file = explicit or os.path.join(root, ".env")
-    if not os.path.exists(env_file):
-        return
-    parsed = _load_dotenv_file(env_file)
-    for k, v in parsed.items():
-        if k not in os.environ:
-            os.environ[k] = v
-
-
-def _env(name: str) -> str | None:
-    _bootstrap_env()
-    v = os.environ.get(name)
-    if not v:
-        return None
-    s = str(v).strip()
-    return s or None
-
-
-def _http_post_json(url: str, payload: dict, headers: dict[str, str], timeout_s: float = 15.0) -> tuple[int, bytes]:
-    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-    req = urllib.request.Request(url, data=data, method="POST")
-    for k, v in headers.items():
-        req.add_header(k, v)
-    try:
-        with urllib.request.urlopen(req, timeout=timeout_s) as res:
-            return int(res.status), res.read()
-    except urllib.error.HTTPError as e:
-        return int(e.code), e.read()
+from tools.env import env as _env
+from tools.http_client import http_post_json
 
 
 def _parse_port_from_url(url: str) -> int | None:
@@ -83,6 +24,7 @@ def _parse_port_from_url(url: str) -> int | None:
         return None
 
 
+@functools.lru_cache(maxsize=1)
 def _maybe_load_napcat_http_token() -> str | None:
     token = _env("NAPCAT_HTTP_TOKEN")
     if token:
@@ -94,8 +36,8 @@ def _maybe_load_napcat_http_token() -> str | None:
         try:
             if not os.path.exists(p):
                 continue
-            raw = open(p, "r", encoding="utf-8").read()
-            parsed = json.loads(raw)
+            with open(p, "rb") as f:
+                parsed = orjson.loads(f.read())
             servers = (((parsed or {}).get("network") or {}).get("httpServers") or []) if isinstance(parsed, dict) else []
             enabled = [s for s in servers if isinstance(s, dict) and s.get("enable", True) is not False]
             matched = None
@@ -113,10 +55,31 @@ def _maybe_load_napcat_http_token() -> str | None:
     return None
 
 
+class NapCatRejectedError(RuntimeError):
+    pass
+
+
+def _not_delivered(e: Exception) -> bool:
+    if isinstance(e, (NapCatRejectedError, requests.exceptions.ConnectTimeout)):
+        return True
+    if isinstance(e, requests.exceptions.ConnectionError) and e.args:
+        return isinstance(getattr(e.args[0], "reason", e.args[0]), NewConnectionError)
+    return False
+
+
+def _target_key(target: dict) -> tuple[str, str]:
+    if str(target.get("chatType") or "") == "private":
+        return "private", str(target.get("userId") or "")
+    return "group", str(target.get("groupId") or "")
+
+
 class NapCatHttpSender:
     def __init__(self) -> None:
         self._http_url = (_env("NAPCAT_HTTP_URL") or "http://127.0.0.1:3000").rstrip("/")
-        self._http_token = _maybe_load_napcat_http_token()
+        self._headers = {"Content-Type": "application/json"}
+        token = _maybe_load_napcat_http_token()
+        if token:
+            self._headers["Authorization"] = f"Bearer {token}"
 
     def send(self, target: dict, text: str) -> None:
         if str(target.get("chatType") or "") == "private":
@@ -124,11 +87,30 @@ class NapCatHttpSender:
             return
         self._call_api("send_group_msg", {"group_id": str(target.get("groupId") or ""), "message": text})
 
+    def send_batch(self, items: list[tuple[dict, str]]) -> list[str | None]:
+        groups: dict[tuple[str, str], list[int]] = {}
+        for i, (target, _) in enumerate(items):
+            groups.setdefault(_target_key(target), []).append(i)
+        errors: list[str | None] = [None] * len(items)
+        for idxs in groups.values():
+            if len(idxs) > 1:
+                try:
+                    self.send(items[idxs[0]][0], "\n".join(items[i][1] for i in idxs))
+                    continue
+                except Exception as e:
+                    if not _not_delivered(e):
+                        for i in idxs:
+                            errors[i] = str(e)
+                        continue
+            for i in idxs:
+                try:
+                    self.send(*items[i])
+                except Exception as e:
+                    errors[i] = str(e)
+        return errors
+
     def _call_api(self, action: str, params: dict) -> None:
         url = f"{self._http_url}/{action}"
-        headers = {"Content-Type": "application/json"}
-        if self._http_token:
-            headers["Authorization"] = f"Bearer {self._http_token}"
-        status, body = _http_post_json(url, params, headers, timeout_s=15.0)
+        status, body = http_post_json(url, params, self._headers, timeout_s=15.0)
         if status < 200 or status >= 300:
-            raise RuntimeError(f"NapCat API {action} failed: {status} {body.decode('utf-8', 'replace')}")
+            raise NapCatRejectedError(f"NapCat API {action} failed: {status} {body.decode('utf-8', 'replace')}")
@@ -1,68 +1,45 @@
 import datetime as _dt
-import os
+import functools
 import re
 
-from zoneinfo import ZoneInfo
-
-_ENV_BOOTSTRAPPED = False
-
-
-def _load_dotenv_file(file_path: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for raw in f.read().splitlines():
-                line = raw.strip()
-                if not line:
-                    continue
-                if line.startswith("#"):
-                    continue
-                if "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                key = k.strip()
-                if not key:
-                    continue
-                val = v.strip()
-                if len(val) >= 2 and ((val[0] == val[-1] and val[0] in ("'", '"')) or (val[0] == "`" and val[-1] == "`")):
-                    val = val[1:-1].strip()
-                out[key] = val
-    except Exception:
-        return {}
-    return out
-
-
-def _bootstrap_env() -> None:
-    global _ENV_BOOTSTRAPPED
-    if _ENV_BOOTSTRAPPED:
-        return
-    _ENV_BOOTSTRAPPED = True
-    explicit = str(os.environ.get("MCP_TOOLS_ENV_FILE") or "").strip()
-    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    env_file = explicit or os.path.join(root, ".env")
-    if not os.path.exists(env_file):
-        return
-    parsed = _load_dotenv_file(env_file)
-    for k, v in parsed.items():
-        if k not in os.environ:
-            os.environ[k] = v
-
-
-def _env(name: str) -> str | None:
-    _bootstrap_env()
-    v = os.environ.get(name)
-    if not v:
-        return None
-    s = str(v).strip()
-    return s or None
+from tools.env import env as _env
+from tools.tz import get_zoneinfo_or_default
+
+_CN_DIGITS = {"零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+
+_MENTIONS_AND_WS_RE = re.compile(r"(?:\s|@\d+)+")
+_WS_RE = re.compile(r"\s+")
+_FIXED_DURATION_RE = re.compile(r"(?:半\s*个\s*|半\s*)(?:小时|钟头)|[一两三]\s*刻\s*钟")
+_FIXED_DURATION_MINUTES = {"半": "30分钟", "一": "15分钟", "两": "30分钟", "三": "45分钟"}
+_N_AND_HALF_HOURS_RE = re.compile(r"(?P<n>\d+|[零〇一二两三四五六七八九十]+)\s*(?:个)?\s*半\s*(?:小时|钟头)")
+_N_HOURS_AND_HALF_RE = re.compile(r"(?P<n>\d+|[零〇一二两三四五六七八九十]+)\s*(?:小时|钟头)\s*半")
+_SELF_TARGET_RE = re.compile(r"(?:提醒|叫|通知|发|发送)\s*(?:一下|下)?\s*(?:我|自己)\b")
+_REMIND_ME_RE = re.compile(r"提醒我(?!们)")
+_HM_RE = re.compile(r"^(\d{1,2})(?:[:：点](\d{1,2}))?$")
+_TIME_TOKEN_RE = re.compile(r"^(?P<h>\d{1,2})\s*(?:[:：]\s*(?P<m>\d{1,2})|点\s*(?:(?P<half>半)|(?P<pm>\d{1,2}))?)?$")
+_DELAY_RE = re.compile(
+    r"^(?:(?:提醒|叫|通知|发|发送)(?:我|你)?\s*)?(?:(\d+|[零〇一二两三四五六七八九十]+)\s*(?:天|d))?\s*(?:(\d+|[零〇一二两三四五六七八九十]+)\s*(?:小时|h))?\s*(?:(\d+|[零〇一二两三四五六七八九十]+)\s*(?:分钟|分|min|m))?\s*(?:后|以后|之后)\s*(?:(?:提醒|叫|通知|发|发送)(?:我|你)?\s*)?(.+)$",
+    re.IGNORECASE,
+)
+_DELAY_VERB_AFTER_RE = re.compile(
+    r"^(?:(\d+|[零〇一二两三四五六七八九十]+)\s*(?:天|d))?\s*(?:(\d+|[零〇一二两三四五六七八九十]+)\s*(?:小时|h))?\s*(?:(\d+|[零〇一二两三四五六七八九十]+)\s*(?:分钟|分|min|m))?\s*(?:后|以后|之后)\s*(?:提醒|叫|通知|发|发送)(?:我|你)?\s*(.+)$",
+    re.IGNORECASE,
+)
+_ABS_DATETIME_RE = re.compile(
+    r"^(\d{4})[-/](\d{1,2})[-/](\d{1,2})\s+(\d{1,2})(?:[:：](\d{1,2}))\s*(?:提醒|叫|通知|发|发送)(?:我)?\s*(.+)$"
+)
+_ABS_HM_RE = re.compile(r"^(?:在\s*)?(今天|明天|后天|今晚)?\s*(\d{1,2}(?:[:：点]\d{1,2})?)\s*(?:提醒|叫|通知|发|发送)(?:我)?\s*(.+)$")
+_MULTI_ABS_RE = re.compile(r"^(?:在\s*)?(今天|明天|后天|今晚)?\s*([\s\S]+?)\s*(?:提醒|叫|通知|发|发送)(?:我|你|ta|他|她)?\s*(.+)$")
+_DAY_HINT_MAP = {"今天": "today", "今晚": "today", "明天": "tomorrow", "后天": "day_after_tomorrow"}
+_VERB_WORDS = ("提醒", "叫", "通知", "发")
+_TRIGGER_WORDS = _VERB_WORDS + ("后",)
+_TIME_LIST_SEP_RE = re.compile(r"[，、]")
+_TIME_LIST_SPLIT_RE = re.compile(r"[,\s]+")
 
 
 def _tz() -> _dt.tzinfo:
     name = str(_env("REMINDER_TIMEZONE") or _env("TIMEZONE") or "").strip() or "Asia/Shanghai"
-    try:
-        return ZoneInfo(name)
-    except Exception:
-        return ZoneInfo("Asia/Shanghai")
+    return get_zoneinfo_or_default(name)
 
 
 def _now_dt(now_ms: int) -> _dt.datetime:
@@ -77,39 +54,31 @@ def _parse_cn_number(text: str) -> int | None:
     s = str(text or "").strip()
     if not s:
         return None
-    if re.fullmatch(r"\d+", s):
+    if s.isdecimal():
         return int(s)
-    mapping = {"零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
     total = 0
     cur = 0
     for ch in s:
         if ch == "十":
-            cur = 1 if cur == 0 else cur
-            total += cur * 10
+            total += (cur or 1) * 10
             cur = 0
             continue
-        if ch not in mapping:
+        d = _CN_DIGITS.get(ch)
+        if d is None:
             return None
-        cur += int(mapping[ch])
-    total += cur
-    return int(total) if total >= 0 else None
+        cur += d
+    return total + cur
 
 
 def _strip_mentions(text: str) -> str:
-    t = str(text or "")
-    t = re.sub(r"@\d+", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
+    return _MENTIONS_AND_WS_RE.sub(" ", str(text or "")).strip()
 
 
 def _rewrite_duration_phrases(text: str) -> str:
     s = str(text or "")
     if not s:
         return s
-    s = re.sub(r"(?:半\s*个\s*|半\s*)(?:小时|钟头)", "30分钟", s)
-    s = re.sub(r"(?:一\s*刻\s*钟)", "15分钟", s)
-    s = re.sub(r"(?:两\s*刻\s*钟)", "30分钟", s)
-    s = re.sub(r"(?:三\s*刻\s*钟)", "45分钟", s)
+    s = _FIXED_DURATION_RE.sub(lambda m: _FIXED_DURATION_MINUTES[m.group(0)[0]], s)
 
     def repl_one_and_half(m: re.Match) -> str:
         raw = str(m.group("n") or "").strip()
@@ -119,27 +88,34 @@ def _rewrite_duration_phrases(text: str) -> str:
         mins = int(n) * 60 + 30
         return f"{mins}分钟"
 
-    s = re.sub(r"(?P<n>\d+|[零〇一二两三四五六七八九十]+)\s*(?:个)?\s*半\s*(?:小时|钟头)", repl_one_and_half, s)
-    s = re.sub(r"(?P<n>\d+|[零〇一二两三四五六七八九十]+)\s*(?:小时|钟头)\s*半", repl_one_and_half, s)
+    s = _N_AND_HALF_HOURS_RE.sub(repl_one_and_half, s)
+    s = _N_HOURS_AND_HALF_RE.sub(repl_one_and_half, s)
     return s
 
 
+def _iter_mention_ids(text: str, start: int = 0, end: int | None = None):
+    n = len(text) if end is None else end
+    i = text.find("@", start, n)
+    while i >= 0:
+        j = i + 1
+        while j < n and text[j].isdecimal():
+            j += 1
+        if j > i + 1:
+            yield text[i + 1 : j]
+        i = text.find("@", j, n)
+
+
 def _extract_mention_ids(text: str) -> list[str]:
-    out: list[str] = []
-    for m in re.finditer(r"@(\d+)", str(text or "")):
-        i = str(m.group(1) or "").strip()
-        if i:
-            out.append(i)
-    return out
+    return list(_iter_mention_ids(str(text or "")))
 
 
 def is_self_reminder_request(text: str) -> bool:
     t = str(text or "")
     if not t:
         return False
-    if re.search(r"(?:提醒|叫|通知|发|发送)\s*(?:一下|下)?\s*(?:我|自己)\b", t):
+    if _SELF_TARGET_RE.search(t):
         return True
-    if re.search(r"提醒我(?!们)", t):
+    if _REMIND_ME_RE.search(t):
         return True
     return False
 
@@ -148,16 +124,15 @@ def pick_mention_user_id_for_request(text: str) -> str | None:
     raw = str(text or "")
     i = raw.find("提醒")
     if i >= 0:
-        after = raw[i:]
-        ids = _extract_mention_ids(after)
-        if ids:
-            return ids[0]
-    ids = _extract_mention_ids(raw)
-    return ids[0] if ids else None
+        first = next(_iter_mention_ids(raw, i), None)
+        if first:
+            return first
+        return next(_iter_mention_ids(raw, 0, i), None)
+    return next(_iter_mention_ids(raw), None)
 
 
 def _parse_hm(text: str) -> tuple[int, int] | None:
-    m = re.match(r"^(\d{1,2})(?:[:：点](\d{1,2}))?$", str(text or "").strip())
+    m = _HM_RE.match(str(text or "").strip())
     if not m:
         return None
     hour = _clamp_int(int(m.group(1)), 0, 23)
@@ -169,19 +144,18 @@ def _parse_time_token(text: str) -> tuple[int, int] | None:
     t = str(text or "").strip()
     if not t:
         return None
-    m1 = re.match(r"^(\d{1,2})\s*(?:[:：]\s*(\d{1,2}))$", t)
-    if m1:
-        return _clamp_int(int(m1.group(1)), 0, 23), _clamp_int(int(m1.group(2)), 0, 59)
-    m2 = re.match(r"^(\d{1,2})\s*点\s*半$", t)
-    if m2:
-        return _clamp_int(int(m2.group(1)), 0, 23), 30
-    m3 = re.match(r"^(\d{1,2})\s*点\s*(\d{1,2})$", t)
-    if m3:
-        return _clamp_int(int(m3.group(1)), 0, 23), _clamp_int(int(m3.group(2)), 0, 59)
-    m4 = re.match(r"^(\d{1,2})\s*点$", t)
-    if m4:
-        return _clamp_int(int(m4.group(1)), 0, 23), 0
-    return _parse_hm(t)
+    m = _TIME_TOKEN_RE.match(t)
+    if not m:
+        return None
+    hour = _clamp_int(int(m.group("h")), 0, 23)
+    if m.group("half"):
+        return hour, 30
+    mins = m.group("m") or m.group("pm")
+    return hour, _clamp_int(int(mins), 0, 59) if mins else 0
+
+
+def _has_verb(text: str) -> bool:
+    return any(w in text for w in _VERB_WORDS)
 
 
 def _compute_next_time(day_hint: str | None, hour: int, minute: int, now_ms: int) -> int:
@@ -196,19 +170,12 @@ def _compute_next_time(day_hint: str | None, hour: int, minute: int, now_ms: int
     return int(base.timestamp() * 1000)
 
 
-def _parse_delay_reminder(text: str, now_ms: int) -> tuple[int, str] | None:
+@functools.lru_cache(maxsize=1024)
+def _delay_parts(text: str) -> tuple[int, str] | None:
     t = _rewrite_duration_phrases(_strip_mentions(text))
-    r1 = re.match(
-        r"^(?:(?:提醒|叫|通知|发|发送)(?:我|你)?\s*)?(?:(\d+|[零〇一二两三四五六七八九十]+)\s*(?:天|d))?\s*(?:(\d+|[零〇一二两三四五六七八九十]+)\s*(?:小时|h))?\s*(?:(\d+|[零〇一二两三四五六七八九十]+)\s*(?:分钟|分|min|m))?\s*(?:后|以后|之后)\s*(?:(?:提醒|叫|通知|发|发送)(?:我|你)?\s*)?(.+)$",
-        t,
-        flags=re.IGNORECASE,
-    )
-    r2 = re.match(
-        r"^(?:(\d+|[零〇一二两三四五六七八九十]+)\s*(?:天|d))?\s*(?:(\d+|[零〇一二两三四五六七八九十]+)\s*(?:小时|h))?\s*(?:(\d+|[零〇一二两三四五六七八九十]+)\s*(?:分钟|分|min|m))?\s*(?:后|以后|之后)\s*(?:提醒|叫|通知|发|发送)(?:我|你)?\s*(.+)$",
-        t,
-        flags=re.IGNORECASE,
-    )
-    m = r1 or r2
+    if "后" not in t:
+        return None
+    m = _DELAY_RE.match(t) or _DELAY_VERB_AFTER_RE.match(t)
     if not m:
         return None
     days_raw = str(m.group(1) or "").strip()
@@ -223,12 +190,23 @@ def _parse_delay_reminder(text: str, now_ms: int) -> tuple[int, str] | None:
     msg = _strip_mentions(m.group(4) or "")
     if not msg:
         return None
+    return delay_ms, msg
+
+
+def _parse_delay_reminder(text: str, now_ms: int) -> tuple[int, str] | None:
+    parts = _delay_parts(str(text or ""))
+    if not parts:
+        return None
+    delay_ms, msg = parts
     return now_ms + int(delay_ms), msg
 
 
-def _parse_absolute_reminder(text: str, now_ms: int) -> tuple[int, str] | None:
+@functools.lru_cache(maxsize=1024)
+def _absolute_parts(text: str) -> tuple | None:
     t = _strip_mentions(text)
-    m_dt = re.match(r"^(\d{4})[-/](\d{1,2})[-/](\d{1,2})\s+(\d{1,2})(?:[:：](\d{1,2}))\s*(?:提醒|叫|通知|发|发送)(?:我)?\s*(.+)$", t)
+    if not _has_verb(t):
+        return None
+    m_dt = _ABS_DATETIME_RE.match(t)
     if m_dt:
         year = int(m_dt.group(1))
         month = _clamp_int(int(m_dt.group(2)), 1, 12)
@@ -238,15 +216,9 @@ def _parse_absolute_reminder(text: str, now_ms: int) -> tuple[int, str] | None:
         msg = _strip_mentions(m_dt.group(6) or "")
         if not msg:
             return None
-        try:
-            due = int(_dt.datetime(year, month, day, hour, minute, tzinfo=_tz()).timestamp() * 1000)
-        except Exception:
-            return None
-        if due <= now_ms:
-            return None
-        return due, msg
+        return "datetime", (year, month, day, hour, minute), msg
 
-    m_hm = re.match(r"^(?:在\s*)?(今天|明天|后天|今晚)?\s*(\d{1,2}(?:[:：点]\d{1,2})?)\s*(?:提醒|叫|通知|发|发送)(?:我)?\s*(.+)$", t)
+    m_hm = _ABS_HM_RE.match(t)
     if not m_hm:
         return None
     hint_raw = str(m_hm.group(1) or "").strip()
@@ -254,24 +226,35 @@ def _parse_absolute_reminder(text: str, now_ms: int) -> tuple[int, str] | None:
     msg = _strip_mentions(m_hm.group(3) or "")
     if not hm or not msg:
         return None
-    day_hint = None
-    if hint_raw == "明天":
-        day_hint = "tomorrow"
-    elif hint_raw == "后天":
-        day_hint = "day_after_tomorrow"
-    elif hint_raw == "今天":
-        day_hint = "today"
-    elif hint_raw:
-        day_hint = "today"
-    due = _compute_next_time(day_hint if day_hint != "today" else "today", hm[0], hm[1], now_ms)
+    day_hint = _DAY_HINT_MAP.get(hint_raw) if hint_raw else None
+    return "time", (day_hint, hm[0], hm[1]), msg
+
+
+def _parse_absolute_reminder(text: str, now_ms: int) -> tuple[int, str] | None:
+    parts = _absolute_parts(str(text or ""))
+    if not parts:
+        return None
+    kind, fields, msg = parts
+    if kind == "datetime":
+        year, month, day, hour, minute = fields
+        try:
+            due = int(_dt.datetime(year, month, day, hour, minute, tzinfo=_tz()).timestamp() * 1000)
+        except Exception:
+            return None
+    else:
+        day_hint, hour, minute = fields
+        due = _compute_next_time(day_hint, hour, minute, now_ms)
     if due <= now_ms:
         return None
     return due, msg
 
 
-def _parse_multi_absolute_reminder(text: str, now_ms: int) -> list[tuple[int, str]] | None:
+@functools.lru_cache(maxsize=1024)
+def _multi_absolute_parts(text: str) -> tuple[str | None, tuple[tuple[int, int], ...], str] | None:
     t = _strip_mentions(text)
-    m = re.match(r"^(?:在\s*)?(今天|明天|后天|今晚)?\s*([\s\S]+?)\s*(?:提醒|叫|通知|发|发送)(?:我|你|ta|他|她)?\s*(.+)$", t)
+    if not _has_verb(t):
+        return None
+    m = _MULTI_ABS_RE.match(t)
     if not m:
         return None
     hint_raw = str(m.group(1) or "").strip()
@@ -279,39 +262,44 @@ def _parse_multi_absolute_reminder(text: str, now_ms: int) -> list[tuple[int, st
     msg = _strip_mentions(m.group(3) or "")
     if not times_raw or not msg:
         return None
-    day_hint = None
-    if hint_raw == "明天":
-        day_hint = "tomorrow"
-    elif hint_raw == "后天":
-        day_hint = "day_after_tomorrow"
-    elif hint_raw == "今天":
-        day_hint = "today"
-    elif hint_raw:
-        day_hint = "today"
-    candidates = re.sub(r"[，、]", ",", times_raw)
-    candidates = re.sub(r"\s+", " ", candidates)
-    parts = [p.strip() for p in re.split(r"[,\s]+", candidates) if p.strip()]
+    candidates = _TIME_LIST_SEP_RE.sub(",", times_raw)
+    candidates = _WS_RE.sub(" ", candidates)
+    parts = [p.strip() for p in _TIME_LIST_SPLIT_RE.split(candidates) if p.strip()]
     if len(parts) < 2:
         return None
-    out: list[tuple[int, str]] = []
-    for c in parts:
-        hm = _parse_time_token(c)
-        if not hm:
-            continue
-        due = _compute_next_time(day_hint if day_hint != "today" else "today", hm[0], hm[1], now_ms)
+    hms = tuple(hm for hm in (_parse_time_token(c) for c in parts) if hm)
+    day_hint = _DAY_HINT_MAP.get(hint_raw) if hint_raw else None
+    return day_hint, hms, msg
+
+
+def _parse_multi_absolute_reminder(text: str, now_ms: int) -> list[tuple[int, str]] | None:
+    parts = _multi_absolute_parts(str(text or ""))
+    if not parts:
+        return None
+    day_hint, hms, msg = parts
+    uniq: dict[int, tuple[int, str]] = {}
+    for hour, minute in hms:
+        due = _compute_next_time(day_hint, hour, minute, now_ms)
         if due <= now_ms:
             continue
-        out.append((due, msg))
-    uniq: dict[int, tuple[int, str]] = {}
-    for due, mmsg in out:
-        uniq[due] = (due, mmsg)
+        uniq[due] = (due, msg)
     lst = sorted(uniq.values(), key=lambda x: x[0])
     return lst if len(lst) >= 2 else None
 
 
 def parse_reminder_requests(text: str, now_ms: int) -> list[tuple[int, str]] | None:
+    if not any(w in str(text or "") for w in _TRIGGER_WORDS):
+        return None
     multi = _parse_multi_absolute_reminder(text, now_ms)
     if multi:
         return multi
     one = _parse_delay_reminder(text, now_ms) or _parse_absolute_reminder(text, now_ms)
     return [one] if one else None
+
+
+def parse_reminder_full(text: str, now_ms: int) -> tuple[list[tuple[int, str]] | None, bool, str | None]:
+    raw = str(text or "")
+    items = parse_reminder_requests(raw, now_ms)
+    if not items:
+        return None, False, None
+    return items, is_self_reminder_request(raw), pick_mention_user_id_for_request(raw)
@@ -4,6 +4,11 @@ import time
 from .napcat_http import NapCatHttpSender
 from .store import ReminderStore
 
+_MIN_SLEEP_S = 0.05
+# reminders.json may be written by other processes without waking us;
+# each wake-up re-stats it, so never sleep longer than this.
+_MAX_SLEEP_S = 2.0
+
 
 def _format_mention(mention_user_id: str | None) -> str | None:
     i = str(mention_user_id or "").strip()
@@ -14,35 +19,59 @@ class ReminderScheduler(threading.Thread):
     def __init__(self, store: ReminderStore, sender: NapCatHttpSender) -> None:
         super().__init__(daemon=True)
         self._stop = threading.Event()
+        self._wake = threading.Event()
         self._store = store
         self._sender = sender
 
     def run(self) -> None:
         while not self._stop.is_set():
             self._tick()
-            time.sleep(1.0)
+            self._wake.wait(timeout=self._next_sleep_s())
+            self._wake.clear()
 
     def stop(self) -> None:
         self._stop.set()
+        self._wake.set()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _next_sleep_s(self) -> float:
+        next_ms = self._store.peek_next_due_ms()
+        if next_ms is None:
+            return _MAX_SLEEP_S
+        now = time.time_ns() // 1_000_000
+        return max(_MIN_SLEEP_S, min(_MAX_SLEEP_S, (next_ms - now) / 1000))
 
     def _tick(self) -> None:
-        now = int(time.time() * 1000)
-        due = self._store.claim_due(now, 10)
+        now = time.time_ns() // 1_000_000
+        due = self._store.claim_due(now, 10, copy=False)
         if not due:
             return
-        for rem in due:
-            rid = str(rem.get("id") or "")
-            if not rid:
-                continue
-            if not self._store.try_acquire_send_lock(rid, now):
-                continue
+        results: list[tuple[str, str | None]] = []
+        locked: list[str] = []
+        outgoing: list[tuple[str, dict, str]] = []
+        try:
+            for rem in due:
+                rid = str(rem.get("id") or "")
+                if not rid:
+                    continue
+                if not self._store.try_acquire_send_lock(rid, now):
+                    continue
+                locked.append(rid)
+                try:
+                    prefix = _format_mention(str(rem.get("mentionUserId") or "").strip() or None)
+                    text = f"{(prefix + ' ') if prefix else ''}提醒：{str(rem.get('text') or '').strip()}".strip()
+                    target = rem.get("target") if isinstance(rem.get("target"), dict) else {}
+                    outgoing.append((rid, target, text))
+                except Exception as e:
+                    results.append((rid, str(e)))
+            if outgoing:
+                errors = self._sender.send_batch([(target, text) for _, target, text in outgoing])
+                results.extend((rid, err) for (rid, _, _), err in zip(outgoing, errors))
+        finally:
             try:
-                prefix = _format_mention(str(rem.get("mentionUserId") or "").strip() or None)
-                text = f"{(prefix + ' ') if prefix else ''}提醒：{str(rem.get('text') or '').strip()}".strip()
-                target = rem.get("target") if isinstance(rem.get("target"), dict) else {}
-                self._sender.send(target, text)
-                self._store.mark_sent(rid)
-            except Exception as e:
-                self._store.mark_failed(rid, str(e))
+                self._store.apply_send_results(results, release_locks=False)
             finally:
-                self._store.release_send_lock(rid)
+                for rid in locked:
+                    self._store.release_send_lock(rid)
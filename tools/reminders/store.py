@@ -1,62 +1,37 @@
-import json
+import bisect
+import heapq
+import operator
 import os
+import threading
 import time
 import uuid
 
-_ENV_BOOTSTRAPPED = False
+import orjson
 
+from tools.env import env as _env
 
-def _load_dotenv_file(file_path: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for raw in f.read().splitlines():
-                line = raw.strip()
-                if not line:
-                    continue
-                if line.startswith("#"):
-                    continue
-                if "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                key = k.strip()
-                if not key:
-                    continue
-                val = v.strip()
-                if len(val) >= 2 and ((val[0] == val[-1] and val[0] in ("'", '"')) or (val[0] == "`" and val[-1] == "`")):
-                    val = val[1:-1].strip()
-                out[key] = val
-    except Exception:
-        return {}
-    return out
-
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def _project_root() -> str:
-    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_CLAIM_STALE_MS = 2 * 60_000
+_SEND_LOCK_STALE_MS = 2 * 60_000
+_READY_ORDER = operator.itemgetter(0, 1)
+_PENDING_ORDER = operator.itemgetter(0)
 
 
-def _bootstrap_env() -> None:
-    global _ENV_BOOTSTRAPPED
-    if _ENV_BOOTSTRAPPED:
-        return
-    _ENV_BOOTSTRAPPED = True
-    explicit = str(os.environ.get("MCP_TOOLS_ENV_FILE") or "").strip()
-    env_file = explicit or os.path.join(_project_root(), ".env")
-    if not os.path.exists(env_file):
-        return
-    parsed = _load_dotenv_file(env_file)
-    for k, v in parsed.items():
-        if k not in os.environ:
-            os.environ[k] = v
+def _project_root() -> str:
+    return _PROJECT_ROOT
 
 
-def _env(name: str) -> str | None:
-    _bootstrap_env()
-    v = os.environ.get(name)
-    if not v:
-        return None
-    s = str(v).strip()
-    return s or None
+def _env_bool(name: str, default: bool) -> bool:
+    v = _env(name)
+    if v is None:
+        return default
+    s = str(v).strip().lower()
+    if s in ("1", "true", "yes", "y", "on"):
+        return True
+    if s in ("0", "false", "no", "n", "off"):
+        return False
+    return default
 
 
 def _project_abs(path: str) -> str:
@@ -69,227 +44,366 @@ def _ensure_dir(p: str) -> None:
     os.makedirs(p, exist_ok=True)
 
 
-def _atomic_write_json(file_path: str, data: object) -> None:
+def _atomic_write_json(file_path: str, data: object) -> os.stat_result:
     _ensure_dir(os.path.dirname(file_path))
-    tmp = f"{file_path}.{os.getpid()}.{int(time.time() * 1000)}.tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    tmp = f"{file_path}.{os.getpid()}.{time.time_ns() // 1_000_000}.tmp"
+    payload = orjson.dumps(data)
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    st = os.stat(tmp)
     os.replace(tmp, file_path)
+    return st
 
 
 def _read_json_file(file_path: str, fallback: object) -> object:
     if not os.path.exists(file_path):
         return fallback
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(file_path, "rb") as f:
+            return orjson.loads(f.read())
     except Exception:
         return fallback
 
 
+def _eligible_at(r: dict) -> int | None:
+    status = r.get("status")
+    if status == "pending":
+        at = int(r.get("dueAtMs") or 0)
+        next_at = r.get("nextAttemptAtMs")
+        if next_at is not None:
+            at = max(at, int(next_at or 0))
+        return at
+    if status == "sending":
+        claimed_at = int(r.get("claimedAtMs") or 0)
+        return claimed_at + _CLAIM_STALE_MS + 1 if claimed_at else None
+    return None
+
+
+def _file_key(st: os.stat_result) -> tuple[int, int, int]:
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
 class ReminderStore:
     def __init__(self) -> None:
         data_dir = _project_abs(_env("DATA_DIR") or "data")
         self._file_path = os.path.join(data_dir, "reminders.json")
         self._lock_dir = os.path.join(data_dir, "reminders.locks")
+        self._lock = threading.RLock()
+        self._multiprocess_lock = _env_bool("REMINDER_MULTIPROCESS_LOCK", False)
+        self._send_locks: dict[str, int] = {}
+        self._send_locks_mu = threading.Lock()
         self._reminders: list[dict] = []
+        self._by_id: dict[str, dict] = {}
+        self._seq: dict[str, int] = {}
+        self._due_heap: list[tuple[int, int, str]] = []
+        self._by_creator: dict[str, list[int]] = {}
+        self._by_source: dict[str, list[int]] = {}
+        self._ids_sorted: list[str] = []
+        self._active: set[int] = set()
+        self._file_key: tuple[int, int, int] | None = None
         self._refresh()
 
+    def _stat_key(self) -> tuple[int, int, int] | None:
+        try:
+            st = os.stat(self._file_path)
+        except OSError:
+            return None
+        return _file_key(st)
+
     def _refresh(self) -> None:
+        key = self._stat_key()
+        if key is not None and key == self._file_key:
+            return
         raw = _read_json_file(self._file_path, [])
         self._reminders = raw if isinstance(raw, list) else []
+        self._by_id = {}
+        self._seq = {}
+        self._due_heap = []
+        self._by_creator = {}
+        self._by_source = {}
+        self._active = set()
+        for i, r in enumerate(self._reminders):
+            if isinstance(r, dict):
+                self._by_creator.setdefault(str(r.get("creatorUserId") or ""), []).append(i)
+                sid = str(r.get("sourceMessageId") or "")
+                if sid:
+                    self._by_source.setdefault(sid, []).append(i)
+                if r.get("status") in ("pending", "sending"):
+                    self._active.add(i)
+                rid = str(r.get("id") or "")
+                if rid and rid not in self._by_id:
+                    self._by_id[rid] = r
+                    self._seq[rid] = i
+                    at = _eligible_at(r)
+                    if at is not None:
+                        self._due_heap.append((at, i, rid))
+        heapq.heapify(self._due_heap)
+        self._ids_sorted = sorted(self._by_id)
+        self._file_key = key
+
+    def _push_due(self, rid: str) -> None:
+        r = self._by_id.get(rid)
+        if r is None:
+            return
+        at = _eligible_at(r)
+        if at is not None:
+            heapq.heappush(self._due_heap, (at, self._seq.get(rid, 0), rid))
+
+    def _sync_active(self, rid: str) -> None:
+        r = self._by_id.get(rid)
+        i = self._seq.get(rid)
+        if r is None or i is None:
+            return
+        if r.get("status") in ("pending", "sending"):
+            self._active.add(i)
+        else:
+            self._active.discard(i)
 
     def _flush(self) -> None:
-        _atomic_write_json(self._file_path, self._reminders)
+        self._file_key = None
+        st = _atomic_write_json(self._file_path, self._reminders)
+        self._file_key = _file_key(st)
 
     def _lock_path(self, reminder_id: str) -> str:
         return os.path.join(self._lock_dir, f"{reminder_id}.lock")
 
     def try_acquire_send_lock(self, reminder_id: str, now_ms: int) -> bool:
+        if self._multiprocess_lock:
+            return self._try_acquire_file_lock(reminder_id, now_ms)
+        with self._send_locks_mu:
+            held_at = self._send_locks.get(reminder_id)
+            if held_at is not None and now_ms - held_at <= _SEND_LOCK_STALE_MS:
+                return False
+            self._send_locks[reminder_id] = now_ms
+            return True
+
+    def _try_acquire_file_lock(self, reminder_id: str, now_ms: int) -> bool:
         _ensure_dir(self._lock_dir)
         p = self._lock_path(reminder_id)
-        stale_ms = 2 * 60_000
-        try:
-            fd = os.open(p, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
-            with os.fdopen(fd, "w", encoding="utf-8") as f:
-                f.write(f"{os.getpid()}\n{now_ms}\n")
-            return True
-        except FileExistsError:
+        stale_ms = _SEND_LOCK_STALE_MS
+        for _ in range(2):
             try:
-                st = os.stat(p)
-                if now_ms - int(st.st_mtime * 1000) > stale_ms:
-                    try:
-                        os.unlink(p)
-                    except Exception:
+                fd = os.open(p, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(f"{os.getpid()}\n{now_ms}\n")
+                return True
+            except FileExistsError:
+                try:
+                    st = os.stat(p)
+                    if now_ms - int(st.st_mtime * 1000) <= stale_ms:
                         return False
-                    return self.try_acquire_send_lock(reminder_id, now_ms)
-            except Exception:
-                return False
-            return False
+                    os.unlink(p)
+                except Exception:
+                    return False
+        return False
 
     def release_send_lock(self, reminder_id: str) -> None:
+        if not self._multiprocess_lock:
+            with self._send_locks_mu:
+                self._send_locks.pop(reminder_id, None)
+            return
         p = self._lock_path(reminder_id)
         try:
             os.unlink(p)
         except Exception:
             return
 
-    def list_pending_by_creator(self, user_id: str, chat_type: str, group_id: str | None) -> list[dict]:
-        self._refresh()
-        out: list[dict] = []
-        for r in self._reminders:
-            if not isinstance(r, dict):
-                continue
-            if r.get("status") not in ("pending", "sending"):
-                continue
-            if str(r.get("creatorUserId") or "") != user_id:
-                continue
-            if chat_type == "private":
-                if r.get("creatorChatType") != "private":
+    def list_pending_by_creator(
+        self, user_id: str, chat_type: str, group_id: str | None, copy: bool = True
+    ) -> list[dict]:
+        with self._lock:
+            self._refresh()
+            out: list[tuple[int, dict]] = []
+            for i in self._by_creator.get(user_id, ()):
+                if i not in self._active:
+                    continue
+                r = self._reminders[i]
+                if chat_type == "private":
+                    if r.get("creatorChatType") != "private":
+                        continue
+                else:
+                    if str(r.get("creatorGroupId") or "") != str(group_id or ""):
+                        continue
+                out.append((int(r.get("dueAtMs") or 0), r))
+            out.sort(key=_PENDING_ORDER)
+            return [dict(r) for _, r in out] if copy else [r for _, r in out]
+
+    def claim_due(self, now_ms: int, limit: int, copy: bool = True) -> list[dict]:
+        with self._lock:
+            self._refresh()
+            stale_ms = _CLAIM_STALE_MS
+            changed = False
+            heap = self._due_heap
+            ready: dict[str, tuple[int, int, str, dict]] = {}
+            while heap and heap[0][0] <= now_ms:
+                _, seq, rid = heapq.heappop(heap)
+                r = self._by_id.get(rid)
+                if r is None or rid in ready:
                     continue
-            else:
-                if str(r.get("creatorGroupId") or "") != str(group_id or ""):
+                if r.get("status") == "sending":
+                    claimed_at = int(r.get("claimedAtMs") or 0)
+                    if claimed_at and now_ms - claimed_at > stale_ms:
+                        r["status"] = "pending"
+                        r.pop("claimedAtMs", None)
+                        changed = True
+                at = _eligible_at(r)
+                if at is None:
                     continue
-            out.append(r)
-        out.sort(key=lambda x: int(x.get("dueAtMs") or 0))
-        return [dict(x) for x in out]
-
-    def claim_due(self, now_ms: int, limit: int) -> list[dict]:
-        self._refresh()
-        stale_ms = 2 * 60_000
-        changed = False
-        for r in self._reminders:
-            if not isinstance(r, dict):
-                continue
-            if r.get("status") != "sending":
-                continue
-            claimed_at = int(r.get("claimedAtMs") or 0)
-            if claimed_at and now_ms - claimed_at > stale_ms:
-                r["status"] = "pending"
-                r.pop("claimedAtMs", None)
+                if at <= now_ms and r.get("status") == "pending":
+                    ready[rid] = (int(r.get("dueAtMs") or 0), seq, rid, r)
+                else:
+                    heapq.heappush(heap, (at, seq, rid))
+
+            n = max(0, int(limit))
+            due: list[dict] = []
+            for _, seq, rid, r in heapq.nsmallest(n, ready.values(), key=_READY_ORDER):
+                r["status"] = "sending"
+                r["claimedAtMs"] = now_ms
+                heapq.heappush(heap, (now_ms + stale_ms + 1, seq, rid))
+                due.append(r)
                 changed = True
-
-        due: list[dict] = []
-        for r in self._reminders:
-            if not isinstance(r, dict):
-                continue
-            if r.get("status") != "pending":
-                continue
-            due_at = int(r.get("dueAtMs") or 0)
-            if due_at > now_ms:
-                continue
-            next_at = r.get("nextAttemptAtMs")
-            if next_at is not None and int(next_at or 0) > now_ms:
-                continue
-            due.append(r)
-
-        due.sort(key=lambda x: int(x.get("dueAtMs") or 0))
-        due = due[: max(0, int(limit))]
-        for r in due:
-            r["status"] = "sending"
-            r["claimedAtMs"] = now_ms
-            changed = True
-        if changed:
-            self._flush()
-        return [dict(x) for x in due]
+            for _, seq, rid, r in ready.values():
+                if r.get("status") == "pending":
+                    heapq.heappush(heap, (_eligible_at(r) or 0, seq, rid))
+            if changed:
+                self._flush()
+            return [dict(x) for x in due] if copy else due
+
+    def peek_next_due_ms(self) -> int | None:
+        with self._lock:
+            self._refresh()
+            heap = self._due_heap
+            while heap:
+                at, seq, rid = heap[0]
+                r = self._by_id.get(rid)
+                cur = _eligible_at(r) if r is not None else None
+                if cur == at:
+                    return at
+                heapq.heappop(heap)
+                if cur is not None:
+                    heapq.heappush(heap, (cur, seq, rid))
+            return None
 
     def create(self, opts: dict) -> dict:
-        self._refresh()
-        source_message_id = str(opts.get("sourceMessageId") or "").strip() if opts.get("sourceMessageId") else None
-        if source_message_id:
-            for r in self._reminders:
-                if not isinstance(r, dict):
-                    continue
-                if str(r.get("sourceMessageId") or "") != source_message_id:
-                    continue
-                if str(r.get("creatorUserId") or "") != str(opts.get("creatorUserId") or ""):
-                    continue
-                if str(r.get("creatorChatType") or "") != str(opts.get("creatorChatType") or ""):
-                    continue
-                if int(r.get("dueAtMs") or 0) != int(opts.get("dueAtMs") or 0):
-                    continue
-                if str(r.get("text") or "").strip() != str(opts.get("text") or "").strip():
-                    continue
-                if str(opts.get("creatorChatType") or "") == "group":
-                    if str(r.get("creatorGroupId") or "") != str(opts.get("creatorGroupId") or ""):
+        with self._lock:
+            self._refresh()
+            source_message_id = str(opts.get("sourceMessageId") or "").strip() if opts.get("sourceMessageId") else None
+            candidates = self._by_source.get(source_message_id, ()) if source_message_id else ()
+            if candidates:
+                opts_user = str(opts.get("creatorUserId") or "")
+                opts_chat = str(opts.get("creatorChatType") or "")
+                opts_due = int(opts.get("dueAtMs") or 0)
+                opts_text = str(opts.get("text") or "").strip()
+                opts_group = str(opts.get("creatorGroupId") or "") if opts_chat == "group" else None
+                for i in candidates:
+                    r = self._reminders[i]
+                    if str(r.get("sourceMessageId") or "") != source_message_id:
+                        continue
+                    if str(r.get("creatorUserId") or "") != opts_user:
+                        continue
+                    if str(r.get("creatorChatType") or "") != opts_chat:
+                        continue
+                    if int(r.get("dueAtMs") or 0) != opts_due:
                         continue
-                return dict(r)
-
-        rem = {
-            "id": str(uuid.uuid4()),
-            "createdAtMs": int(time.time() * 1000),
-            "status": "pending",
-            "attempts": 0,
-            **opts,
-            "text": str(opts.get("text") or "").strip(),
-        }
-        self._reminders.append(rem)
-        self._flush()
-        return dict(rem)
+                    if str(r.get("text") or "").strip() != opts_text:
+                        continue
+                    if opts_group is not None and str(r.get("creatorGroupId") or "") != opts_group:
+                        continue
+                    return dict(r)
+
+            rem = {
+                "id": str(uuid.uuid4()),
+                "createdAtMs": time.time_ns() // 1_000_000,
+                "status": "pending",
+                "attempts": 0,
+                **opts,
+                "text": str(opts.get("text") or "").strip(),
+            }
+            self._reminders.append(rem)
+            i = len(self._reminders) - 1
+            if rem["id"] not in self._by_id:
+                self._by_id[rem["id"]] = rem
+                self._seq[rem["id"]] = i
+                bisect.insort(self._ids_sorted, rem["id"])
+            self._by_creator.setdefault(str(rem.get("creatorUserId") or ""), []).append(i)
+            sid = str(rem.get("sourceMessageId") or "")
+            if sid:
+                self._by_source.setdefault(sid, []).append(i)
+            self._sync_active(rem["id"])
+            self._push_due(rem["id"])
+            self._flush()
+            return dict(rem)
 
     def cancel(self, user_id: str, reminder_id: str) -> dict | None:
-        self._refresh()
-        key = str(reminder_id or "").strip()
-        if not key:
-            return None
-        exact = None
-        for r in self._reminders:
-            if not isinstance(r, dict):
-                continue
-            if str(r.get("id") or "") == key and str(r.get("creatorUserId") or "") == user_id:
-                exact = r
-                break
-        rem = exact
-        if rem is None and len(key) < 36:
-            for r in self._reminders:
-                if not isinstance(r, dict):
-                    continue
-                if str(r.get("creatorUserId") or "") != user_id:
-                    continue
-                rid = str(r.get("id") or "")
-                if rid.startswith(key):
-                    rem = r
-                    break
-        if rem is None:
-            return None
-        if rem.get("status") not in ("pending", "sending"):
+        with self._lock:
+            self._refresh()
+            key = str(reminder_id or "").strip()
+            if not key:
+                return None
+            exact = self._by_id.get(key)
+            if exact is not None and str(exact.get("creatorUserId") or "") != user_id:
+                exact = None
+            rem = exact
+            if rem is None and len(key) < 36:
+                ids = self._ids_sorted
+                best = None
+                for j in range(bisect.bisect_left(ids, key), len(ids)):
+                    rid = ids[j]
+                    if not rid.startswith(key):
+                        break
+                    r = self._by_id[rid]
+                    if str(r.get("creatorUserId") or "") != user_id:
+                        continue
+                    if best is None or self._seq[rid] < self._seq[best]:
+                        best = rid
+                if best is not None:
+                    rem = self._by_id[best]
+            if rem is None:
+                return None
+            if rem.get("status") not in ("pending", "sending"):
+                return dict(rem)
+            rem["status"] = "canceled"
+            rem["canceledAtMs"] = time.time_ns() // 1_000_000
+            rem.pop("nextAttemptAtMs", None)
+            rem.pop("claimedAtMs", None)
+            self._sync_active(str(rem.get("id") or ""))
+            self.release_send_lock(str(rem.get("id") or ""))
+            self._flush()
             return dict(rem)
-        rem["status"] = "canceled"
-        rem["canceledAtMs"] = int(time.time() * 1000)
-        rem.pop("nextAttemptAtMs", None)
-        rem.pop("claimedAtMs", None)
-        self.release_send_lock(str(rem.get("id") or ""))
-        self._flush()
-        return dict(rem)
 
     def mark_sent(self, reminder_id: str) -> None:
-        self._refresh()
-        for r in self._reminders:
-            if not isinstance(r, dict):
-                continue
-            if str(r.get("id") or "") != reminder_id:
-                continue
-            r["status"] = "sent"
-            r["sentAtMs"] = int(time.time() * 1000)
-            r.pop("lastError", None)
-            r.pop("nextAttemptAtMs", None)
-            r.pop("claimedAtMs", None)
-            self.release_send_lock(reminder_id)
-            self._flush()
-            return
+        self.apply_send_results([(reminder_id, None)])
 
     def mark_failed(self, reminder_id: str, error: str) -> None:
-        self._refresh()
-        for r in self._reminders:
-            if not isinstance(r, dict):
-                continue
-            if str(r.get("id") or "") != reminder_id:
-                continue
-            r["status"] = "pending"
-            r["attempts"] = int(r.get("attempts") or 0) + 1
-            r["lastError"] = str(error or "send_failed")
-            r["nextAttemptAtMs"] = int(time.time() * 1000) + 10_000
-            r.pop("claimedAtMs", None)
-            self.release_send_lock(reminder_id)
-            self._flush()
-            return
+        self.apply_send_results([(reminder_id, str(error or "send_failed"))])
+
+    def apply_send_results(self, results: list[tuple[str, str | None]], *, release_locks: bool = True) -> None:
+        with self._lock:
+            if not results:
+                return
+            self._refresh()
+            now_ms = time.time_ns() // 1_000_000
+            changed = False
+            for rid, error in dict(results).items():
+                r = self._by_id.get(rid)
+                if r is None:
+                    continue
+                if error is None:
+                    r["status"] = "sent"
+                    r["sentAtMs"] = now_ms
+                    r.pop("lastError", None)
+                    r.pop("nextAttemptAtMs", None)
+                else:
+                    r["status"] = "pending"
+                    r["attempts"] = int(r.get("attempts") or 0) + 1
+                    r["lastError"] = error or "send_failed"
+                    r["nextAttemptAtMs"] = now_ms + 10_000
+                r.pop("claimedAtMs", None)
+                self._sync_active(rid)
+                self._push_due(rid)
+                changed = True
+            if changed:
+                self._flush()
+            if release_locks:
+                for rid, _ in results:
+                    self.release_send_lock(rid)
@@ -3,23 +3,23 @@
 from __future__ import annotations
 
 import datetime as dt
-import os
+import functools
 import threading
 import time
 from typing import Any
 
-from zoneinfo import ZoneInfo
-
 from mcp.server.fastmcp import FastMCP
 from .napcat_http import NapCatHttpSender
 from .parser import (
     is_self_reminder_request,
-    parse_reminder_requests,
+    parse_reminder_full,
     pick_mention_user_id_for_request,
 )
 from .scheduler import ReminderScheduler
 from .store import ReminderStore
+from tools.env import env as _env
 from tools.limits import enforce_daily_limits
+from tools.tz import get_zoneinfo_or_default
 
 
 _LOCK = threading.Lock()
@@ -28,59 +28,6 @@ _SENDER: NapCatHttpSender | None = None
 _SCHEDULER: ReminderScheduler | None = None
 
 
-_ENV_BOOTSTRAPPED = False
-
-
-def _load_dotenv_file(file_path: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for raw in f.read().splitlines():
-                line = raw.strip()
-                if not line:
-                    continue
-                if line.startswith("#"):
-                    continue
-                if "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                key = k.strip()
-                if not key:
-                    continue
-                val = v.strip()
-                if len(val) >= 2 and ((val[0] == val[-1] and val[0] in ("'", '"')) or (val[0] == "`" and val[-1] == "`")):
-                    val = val[1:-1].strip()
-                out[key] = val
-    except Exception:
-        return {}
-    return out
-
-
-def _bootstrap_env() -> None:
-    global _ENV_BOOTSTRAPPED
-    if _ENV_BOOTSTRAPPED:
-        return
-    _ENV_BOOTSTRAPPED = True
-    explicit = str(os.environ.get("MCP_TOOLS_ENV_FILE") or "").strip()
-    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    env_file = explicit or os.path.join(root, ".env")
-    if not os.path.exists(env_file):
-        return
-    parsed = _load_dotenv_file(env_file)
-    for k, v in parsed.items():
-        if k not in os.environ:
-            os.environ[k] = v
-
-
-def _env(name: str) -> str | None:
-    _bootstrap_env()
-    v = os.environ.get(name)
-    if not v:
-        return None
-    s = str(v).strip()
-    return s or None
-
-
 def _ensure_runtime() -> tuple[ReminderStore, NapCatHttpSender]:
     global _STORE, _SENDER, _SCHEDULER
     with _LOCK:
@@ -94,22 +41,37 @@ def _ensure_runtime() -> tuple[ReminderStore, NapCatHttpSender]:
         return _STORE, _SENDER
 
 
-def _tz() -> dt.tzinfo:
-    name = str(_env("REMINDER_TIMEZONE") or _env("TIMEZONE") or "").strip() or "Asia/Shanghai"
-    try:
-        return ZoneInfo(name)
-    except Exception:
-        return ZoneInfo("Asia/Shanghai")
+def _wake_scheduler() -> None:
+    if _SCHEDULER is not None:
+        _SCHEDULER.wake()
+
+
+def _tz_name() -> str:
+    return str(_env("REMINDER_TIMEZONE") or _env("TIMEZONE") or "").strip() or "Asia/Shanghai"
+
+
+def _local_dt(ms: int, tz_name: str) -> dt.datetime:
+    return dt.datetime.fromtimestamp(ms / 1000, tz=get_zoneinfo_or_default(tz_name))
 
 
-def _fmt_time(ms: int) -> str:
-    d = dt.datetime.fromtimestamp(ms / 1000, tz=_tz())
-    return d.strftime("%Y/%m/%d %H:%M:%S")
+@functools.lru_cache(maxsize=1024)
+def _fmt_time_cached(ms: int, tz_name: str) -> str:
+    d = _local_dt(ms, tz_name)
+    return f"{d.year:04d}/{d.month:02d}/{d.day:02d} {d.hour:02d}:{d.minute:02d}:{d.second:02d}"
 
 
-def _fmt_hm(ms: int) -> str:
-    d = dt.datetime.fromtimestamp(ms / 1000, tz=_tz())
-    return d.strftime("%H:%M")
+@functools.lru_cache(maxsize=1024)
+def _fmt_hm_cached(ms: int, tz_name: str) -> str:
+    d = _local_dt(ms, tz_name)
+    return f"{d.hour:02d}:{d.minute:02d}"
+
+
+def _fmt_time(ms: int, tz_name: str | None = None) -> str:
+    return _fmt_time_cached(ms, tz_name or _tz_name())
+
+
+def _fmt_hm(ms: int, tz_name: str | None = None) -> str:
+    return _fmt_hm_cached(ms, tz_name or _tz_name())
 
 
 def _format_at(user_id: str) -> str:
@@ -141,7 +103,7 @@ def register(mcp: FastMCP) -> None:
         group_id0 = str(group_id or "").strip() if group_id is not None else None
         message_id0 = str(message_id or "").strip() if message_id is not None else None
         request0 = str(request or "").strip()
-        now0 = int(now_ms or int(time.time() * 1000))
+        now0 = int(now_ms or time.time_ns() // 1_000_000)
         if not chat_type0 or not user_id0:
             return "参数错误：chat_type / user_id 为必填"
 
@@ -149,15 +111,14 @@ def register(mcp: FastMCP) -> None:
         text0 = str(text or "").strip()
         if isinstance(due_at_ms, int) and text0:
             parsed = [(int(due_at_ms), text0)]
+            wants_self = is_self_reminder_request(request0) if request0 else True
+            mention_from_text = pick_mention_user_id_for_request(request0) if request0 else None
         else:
             if not request0:
                 return "参数错误：request 为必填（或提供 due_at_ms + text）"
-            parsed = parse_reminder_requests(request0, now0)
+            parsed, wants_self, mention_from_text = parse_reminder_full(request0, now0)
             if not parsed:
                 return "我没看懂提醒时间。你可以这样说：1分钟后提醒我 喝水 / 在20:30提醒我 下楼拿快递"
-
-        wants_self = is_self_reminder_request(request0) if request0 else True
-        mention_from_text = pick_mention_user_id_for_request(request0) if request0 else None
         mention_user_id0 = (
             str(mention_user_id or (user_id0 if wants_self else (mention_from_text or (user_id0 if chat_type0 == "group" else ""))))
             .strip()
@@ -182,9 +143,11 @@ def register(mcp: FastMCP) -> None:
                     }
                 )
             )
+        _wake_scheduler()
 
         if len(created) >= 2:
-            times = "、".join([_fmt_hm(int(r.get("dueAtMs") or 0)) for r in created])
+            tz_name = _tz_name()
+            times = "、".join([_fmt_hm(int(r.get("dueAtMs") or 0), tz_name) for r in created])
             prefix = f"{_format_at(user_id0)} " if chat_type0 == "group" else ""
             who = f"，目标QQ：{mention_user_id0}" if (chat_type0 == "group" and mention_user_id0 and mention_user_id0 != user_id0) else ""
             return f"{prefix}已设置 {len(created)} 个提醒：{times}{who}，内容：{str(created[0].get('text') or '').strip()}".strip()
@@ -207,13 +170,16 @@ def register(mcp: FastMCP) -> None:
         limit0 = max(1, min(20, int(limit or 10)))
         if not chat_type0 or not user_id0:
             return "参数错误：chat_type / user_id 为必填"
-        lst = store.list_pending_by_creator(user_id0, "group" if chat_type0 == "group" else "private", group_id0)
+        lst = store.list_pending_by_creator(
+            user_id0, "group" if chat_type0 == "group" else "private", group_id0, copy=False
+        )
         if not lst:
             return "暂无待提醒事项"
+        tz_name = _tz_name()
         lines: list[str] = []
         for i, r in enumerate(lst[:limit0]):
             rid = str(r.get("id") or "")
-            lines.append(f"{i + 1}. {_fmt_time(int(r.get('dueAtMs') or 0))}：{str(r.get('text') or '').strip()}（{rid[:8]}）")
+            lines.append(f"{i + 1}. {_fmt_time(int(r.get('dueAtMs') or 0), tz_name)}：{str(r.get('text') or '').strip()}（{rid[:8]}）")
         return "待提醒：\n" + "\n".join(lines)
 
     @mcp.tool(name="reminder_cancel", description="取消我创建的提醒（通过提醒ID前缀）")
@@ -228,6 +194,7 @@ def register(mcp: FastMCP) -> None:
         if not user_id0 or not reminder_id0:
             return "参数错误：user_id / reminder_id 为必填"
         rem = store.cancel(user_id0, reminder_id0)
+        _wake_scheduler()
         if not rem:
             return "未找到要取消的提醒（请提供提醒ID）"
         return "已取消提醒" if str(rem.get("status") or "") == "canceled" else "该提醒已不是待执行状态"
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import functools
+from zoneinfo import ZoneInfo
+
+DEFAULT_TIMEZONE = "Asia/Shanghai"
+
+
+@functools.lru_cache(maxsize=64)
+def get_zoneinfo(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
+
+
+@functools.lru_cache(maxsize=64)
+def get_zoneinfo_or_default(name: str) -> ZoneInfo:
+    try:
+        return get_zoneinfo(name)
+    except Exception:
+        return get_zoneinfo(DEFAULT_TIMEZONE)
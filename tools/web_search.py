@@ -2,81 +2,28 @@
 
 from __future__ import annotations
 
-import json
-import os
+import functools
 import re
-import urllib.error
-import urllib.request
+from collections import deque
+from concurrent.futures import Future
 
+import orjson
 from mcp.server.fastmcp import FastMCP
 
+from tools.env import env as _env
+from tools.executor import submit
+from tools.http_client import http_post_json
 from tools.limits import enforce_daily_limits
 
-_ENV_BOOTSTRAPPED = False
+_QUERY_SUFFIX_RE = re.compile(r"(?:的)?(?:趣事|八卦|梗|故事|名场面|集锦)\s*$")
+_WS_RE = re.compile(r"\s+")
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+_LATIN_RE = re.compile(r"[A-Za-z]")
+_NEWS_RE = re.compile(r"(新闻|热搜|要闻|摘要|热点)")
 
+_BLOCKED_LINK_MARKERS = ("tophub.",)
 
-def _load_dotenv_file(file_path: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for raw in f.read().splitlines():
-                line = raw.strip()
-                if not line:
-                    continue
-                if line.startswith("#"):
-                    continue
-                if "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                key = k.strip()
-                if not key:
-                    continue
-                val = v.strip()
-                if len(val) >= 2 and (
-                    (val[0] == val[-1] and val[0] in ("'", '"')) or (val[0] == "`" and val[-1] == "`")
-                ):
-                    val = val[1:-1].strip()
-                out[key] = val
-    except Exception:
-        return {}
-    return out
-
-
-def _bootstrap_env() -> None:
-    global _ENV_BOOTSTRAPPED
-    if _ENV_BOOTSTRAPPED:
-        return
-    _ENV_BOOTSTRAPPED = True
-    explicit = str(os.environ.get("MCP_TOOLS_ENV_FILE") or "").strip()
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    env_file = explicit or os.path.join(root, ".env")
-    if not os.path.exists(env_file):
-        return
-    parsed = _load_dotenv_file(env_file)
-    for k, v in parsed.items():
-        if k not in os.environ:
-            os.environ[k] = v
-
-
-def _env(name: str) -> str | None:
-    _bootstrap_env()
-    v = os.environ.get(name)
-    if not v:
-        return None
-    s = str(v).strip()
-    return s or None
-
-
-def _http_post_json(url: str, payload: dict, headers: dict[str, str], timeout_s: float = 15.0) -> tuple[int, bytes]:
-    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-    req = urllib.request.Request(url, data=data, method="POST")
-    for k, v in headers.items():
-        req.add_header(k, v)
-    try:
-        with urllib.request.urlopen(req, timeout=timeout_s) as res:
-            return int(res.status), res.read()
-    except urllib.error.HTTPError as e:
-        return int(e.code), e.read()
+_PARALLEL_ATTEMPTS = 3
 
 
 def _normalize_queries(q: str) -> list[str]:
@@ -84,52 +31,62 @@ def _normalize_queries(q: str) -> list[str]:
     if not raw:
         return []
     variants: list[str] = [raw]
-    no_suffix = re.sub(r"(?:的)?(?:趣事|八卦|梗|故事|名场面|集锦)\s*$", "", raw).strip()
+    no_suffix = _QUERY_SUFFIX_RE.sub("", raw).strip()
     if no_suffix and no_suffix != raw:
         variants.append(no_suffix)
-    compact = re.sub(r"\s+", " ", no_suffix).strip()
+    compact = _WS_RE.sub(" ", no_suffix).strip()
     if compact and compact != no_suffix:
         variants.append(compact)
-    out: list[str] = []
-    for v in variants:
-        if v not in out:
-            out.append(v)
-    return out[:3]
+    return list(dict.fromkeys(variants))[:3]
+
+
+def _format_serper_result(r: dict) -> str | None:
+    link = r.get("link")
+    if link and any(b in str(link).lower() for b in _BLOCKED_LINK_MARKERS):
+        return None
+    title = r.get("title") or "无标题"
+    snippet = r.get("snippet") or "无摘要"
+    return f"{title} - {snippet} ({link})" if link else f"{title} - {snippet}"
+
+
+def _format_search1_result(r: dict) -> str:
+    title = r.get("title") or "无标题"
+    snippet = r.get("snippet") or r.get("description") or "无摘要"
+    link = r.get("link")
+    return f"{title} - {snippet} ({link})" if link else f"{title} - {snippet}"
+
+
+@functools.lru_cache(maxsize=4)
+def _serper_headers(api_key: str) -> dict[str, str]:
+    return {"Content-Type": "application/json", "X-API-KEY": api_key}
+
+
+@functools.lru_cache(maxsize=4)
+def _search1_headers(api_key: str) -> dict[str, str]:
+    return {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
 
 
 def _try_serper_search(api_key: str, query: str, prefer_zh: bool) -> str:
     payload = {"q": query, "gl": "cn" if prefer_zh else "us", "hl": "zh-cn" if prefer_zh else "en", "num": 5}
-    status, body = _http_post_json(
+    status, body = http_post_json(
         "https://google.serper.dev/search",
         payload,
-        {"Content-Type": "application/json", "X-API-KEY": api_key},
+        _serper_headers(api_key),
         timeout_s=20.0,
     )
+    if status < 200 or status >= 300:
+        raise RuntimeError(f"Serper: HTTP {status} {body[:500].decode('utf-8', errors='replace')}")
     parsed: object | None
     try:
-        parsed = json.loads(body.decode("utf-8"))
+        parsed = orjson.loads(body)
     except Exception:
         parsed = None
-    if status < 200 or status >= 300:
-        raise RuntimeError(f"Serper: HTTP {status} {json.dumps(parsed, ensure_ascii=False)}")
     organic = parsed.get("organic") if isinstance(parsed, dict) else None
     results = organic if isinstance(organic, list) else []
     if not results:
         return f"未找到与 '{query}' 相关的搜索结果。"
-    lines: list[str] = []
-    for r in results[:5]:
-        if not isinstance(r, dict):
-            continue
-        link = str(r.get("link") or "").lower()
-        if link and "tophub." in link:
-            continue
-        title = str(r.get("title") or "无标题")
-        snippet = str(r.get("snippet") or "无摘要")
-        if r.get("link"):
-            lines.append(f"{title} - {snippet} ({r.get('link')})")
-        else:
-            lines.append(f"{title} - {snippet}")
-    return "搜索结果：\n" + "\n".join(lines)
+    lines = (_format_serper_result(r) for r in results[:5] if isinstance(r, dict))
+    return "搜索结果：\n" + "\n".join(line for line in lines if line is not None)
 
 
 def _try_search1api(api_key: str, query: str, prefer_zh: bool) -> str:
@@ -145,7 +102,7 @@ def _try_search1api(api_key: str, query: str, prefer_zh: bool) -> str:
         "time_range": "month",
         "exclude_sites": ["wikipedia.org", "tophub.today", "tophub.link", "tophub.fun"],
     }
-    if prefer_zh and re.search(r"(新闻|热搜|要闻|摘要|热点)", query):
+    if prefer_zh and _NEWS_RE.search(query):
         payload["include_sites"] = [
             "news.sina.com.cn",
             "news.qq.com",
@@ -157,19 +114,19 @@ def _try_search1api(api_key: str, query: str, prefer_zh: bool) -> str:
             "guancha.cn",
         ]
 
-    status, body = _http_post_json(
+    status, body = http_post_json(
         url,
         payload,
-        {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"},
+        _search1_headers(api_key),
         timeout_s=20.0,
     )
+    if status < 200 or status >= 300:
+        raise RuntimeError(f"Search1API: HTTP {status} {body[:500].decode('utf-8', errors='replace')}")
     parsed: object | None
     try:
-        parsed = json.loads(body.decode("utf-8"))
+        parsed = orjson.loads(body)
     except Exception:
         parsed = None
-    if status < 200 or status >= 300:
-        raise RuntimeError(f"Search1API: HTTP {status} {json.dumps(parsed, ensure_ascii=False)}")
 
     results: list = []
     if isinstance(parsed, dict):
@@ -180,15 +137,7 @@ def _try_search1api(api_key: str, query: str, prefer_zh: bool) -> str:
                 break
     if not results:
         return f"未找到与 '{query}' 相关的搜索结果。"
-    lines: list[str] = []
-    for r in results[:5]:
-        if not isinstance(r, dict):
-            continue
-        title = str(r.get("title") or "无标题")
-        snippet = str(r.get("snippet") or r.get("description") or "无摘要")
-        link = r.get("link")
-        lines.append(f"{title} - {snippet}{f' ({link})' if link else ''}")
-    return "搜索结果：\n" + "\n".join(lines)
+    return "搜索结果：\n" + "\n".join(_format_search1_result(r) for r in results[:5] if isinstance(r, dict))
 
 
 def register(mcp: FastMCP) -> None:
@@ -208,32 +157,43 @@ def register(mcp: FastMCP) -> None:
         if not q:
             return "错误：搜索查询不能为空或无效。"
         errors: list[str] = []
-        has_cjk = bool(re.search(r"[\u4e00-\u9fff]", q))
-        has_latin = bool(re.search(r"[A-Za-z]", q))
+        has_cjk = not q.isascii() and bool(_CJK_RE.search(q))
+        has_latin = bool(_LATIN_RE.search(q))
         variants = _normalize_queries(q)
         langs = [True, False] if (has_cjk and has_latin) else [has_cjk]
 
         search1_key = _env("SEARCH_API_KEY")
-        if search1_key:
-            for qq in variants:
-                for prefer_zh in langs:
-                    try:
-                        text = _try_search1api(search1_key, qq, prefer_zh)
-                        if "未找到与" not in text:
-                            return text
-                    except Exception as e:
-                        errors.append(str(e))
-
         serper_key = _env("SERPER_API_KEY")
+        per_provider: list[list[tuple]] = []
+        if search1_key:
+            per_provider.append([(_try_search1api, search1_key, qq, prefer_zh) for qq in variants for prefer_zh in langs])
         if serper_key:
-            for qq in variants:
-                for prefer_zh in langs:
-                    try:
-                        text = _try_serper_search(serper_key, qq, prefer_zh)
-                        if "未找到与" not in text:
-                            return text
-                    except Exception as e:
-                        errors.append(str(e))
+            per_provider.append([(_try_serper_search, serper_key, qq, prefer_zh) for qq in variants for prefer_zh in langs])
+        attempts: list[tuple] = [a[0] for a in per_provider] + [x for a in per_provider for x in a[1:]]
+
+        pending: deque[Future] = deque()
+        it = iter(attempts)
+
+        def submit_next() -> None:
+            a = next(it, None)
+            if a is not None:
+                pending.append(submit(*a))
+
+        for _ in range(_PARALLEL_ATTEMPTS):
+            submit_next()
+        while pending:
+            fut = pending.popleft()
+            try:
+                text = fut.result()
+            except Exception as e:
+                errors.append(str(e))
+                submit_next()
+                continue
+            if "未找到与" not in text:
+                for f in pending:
+                    f.cancel()
+                return text
+            submit_next()
 
         if not search1_key and not serper_key:
             return "缺少 SEARCH_API_KEY / SERPER_API_KEY，无法联网搜索"